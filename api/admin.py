@@ -0,0 +1,15 @@
+"""
+Vercel serverless function for the Django admin (/admin/, see vercel.json)
+
+Same handler as api/index.py, with the full configuration (admin, auth,
+sessions, messages): these imports are only paid when the admin is used.
+"""
+import os
+import sys
+from pathlib import Path
+
+os.environ['DJANGO_PUBLIC_ONLY'] = 'false'
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from api.index import handler  # noqa: E402,F401
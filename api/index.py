@@ -1,29 +1,68 @@
 """
 Vercel serverless function handler for Django
 Compatible with Vercel Python runtime
+
+- The WSGI response is read once into a single buffer (a single-chunk
+  response, the usual Django case, is not copied at all).
+- Text bodies (text/*, JSON, JavaScript, XML, SVG in UTF-8, not compressed)
+  are returned as strings; everything else (images, fonts, gzip...) is
+  base64-encoded, so binary responses are no longer corrupted.
+- Repeated response headers (Set-Cookie...) are returned as lists.
+- One log line per request when VERCEL_LOG_REQUESTS=1 (off by default).
+
+Cold start: this function serves the public site with DJANGO_PUBLIC_ONLY=true
+(see settings_vercel: no admin, auth, sessions or messages). /admin/ is routed
+to api/admin.py, which loads the full configuration. The duration of each
+cold-start phase (settings, django.setup(), WSGI application, first request)
+is logged once per instance and sent in the Server-Timing header of the first
+response. `python manage.py bench_cold_start` compares both modes.
 """
+import time
+
+START = time.perf_counter()
+
+import base64
 import os
 import sys
-from pathlib import Path
 from io import BytesIO
+from pathlib import Path
+from urllib.parse import unquote_to_bytes, urlencode, urlsplit
 
 # Add the project root to Python path
 BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(BASE_DIR))
 
-# Log startup
-print(f"Starting handler, BASE_DIR: {BASE_DIR}", file=sys.stderr)
-print(f"Python version: {sys.version}", file=sys.stderr)
-print(f"Python path: {sys.path[:3]}", file=sys.stderr)
-
 # Set Django settings module
 settings_file = os.path.join(BASE_DIR, 'liftandlight', 'settings_vercel.py')
 if os.path.exists(settings_file):
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'liftandlight.settings_vercel')
-    print("Using settings_vercel", file=sys.stderr)
 else:
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'liftandlight.settings')
-    print("Using default settings", file=sys.stderr)
+os.environ.setdefault('DJANGO_PUBLIC_ONLY', 'true')
+
+LOG_REQUESTS = os.environ.get('VERCEL_LOG_REQUESTS', '').lower() in ('1', 'true', 'yes')
+
+# Content types returned as text (besides text/*), when the charset is UTF-8
+TEXT_CONTENT_TYPES = {
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'application/xhtml+xml',
+    'application/manifest+json',
+    'image/svg+xml',
+}
+TEXT_CHARSETS = {'utf-8', 'utf8', 'us-ascii', 'ascii'}
+
+# Cold-start phases, in milliseconds
+COLD_START = {}
+cold_start_pending = True
+
+
+def mark(phase, since):
+    now = time.perf_counter()
+    COLD_START[phase] = (now - since) * 1000
+    return now
+
 
 # Try to import and setup Django
 django_ready = False
@@ -32,27 +71,201 @@ error_message = None
 error_traceback = None
 
 try:
-    print("Importing django...", file=sys.stderr)
+    t = mark('imports', START)
     import django
-    print(f"Django version: {django.get_version()}", file=sys.stderr)
-    print("Calling django.setup()...", file=sys.stderr)
+    from django.conf import settings
+    settings.INSTALLED_APPS
+    t = mark('settings', t)
     django.setup()
-    print("Django setup complete", file=sys.stderr)
-    
+    t = mark('setup', t)
+
     # Import WSGI application
-    print("Importing WSGI application...", file=sys.stderr)
     from liftandlight.wsgi import application
-    print("WSGI application imported successfully", file=sys.stderr)
+    mark('application', t)
     django_ready = True
 except Exception as e:
     error_message = str(e)
     import traceback
     error_traceback = traceback.format_exc()
-    print(f"Django setup error: {error_message}", file=sys.stderr)
-    print(error_traceback, file=sys.stderr)
+    print(f"Django setup error: {error_message}\n{error_traceback}", file=sys.stderr)
     django_ready = False
     application = None
 
+
+def get_request_headers(request):
+    """Request headers as a dict, repeated values joined"""
+    raw = getattr(request, 'headers', None) or {}
+    items = raw.items() if hasattr(raw, 'items') else raw
+    headers = {}
+    for key, value in items:
+        key = str(key).lower()
+        if isinstance(value, (list, tuple)):
+            value = ('; ' if key == 'cookie' else ', ').join(str(v) for v in value)
+        if key in headers:
+            value = f"{headers[key]}{'; ' if key == 'cookie' else ', '}{value}"
+        headers[key] = str(value)
+    return headers
+
+
+def get_request_body(request):
+    body = getattr(request, 'body', None) or b''
+    if isinstance(body, str):
+        if getattr(request, 'isBase64Encoded', False) or getattr(request, 'encoding', None) == 'base64':
+            return base64.b64decode(body)
+        return body.encode('utf-8')
+    return bytes(body)
+
+
+def get_path_and_query(request):
+    """PATH_INFO and QUERY_STRING, taken from the raw URL when available"""
+    url = str(getattr(request, 'url', '') or '')
+    parsed = urlsplit(url)
+    path = str(getattr(request, 'path', '') or '') or parsed.path or '/'
+    if '?' in path:
+        path, query_string = path.split('?', 1)
+        return path, query_string
+    if parsed.query:
+        return path, parsed.query
+    query = getattr(request, 'query', None)
+    if isinstance(query, dict) and query:
+        return path, urlencode(query, doseq=True)
+    return path, ''
+
+
+def build_environ(request):
+    method = str(getattr(request, 'method', 'GET') or 'GET').upper()
+    path, query_string = get_path_and_query(request)
+    headers = get_request_headers(request)
+    body = get_request_body(request)
+
+    host = headers.get('x-forwarded-host') or headers.get('host') or 'localhost'
+    server_name, _, server_port = host.partition(':')
+    scheme = 'https' if headers.get('x-forwarded-proto', '').split(',')[0].strip() == 'https' else 'http'
+
+    environ = {
+        'REQUEST_METHOD': method,
+        'SCRIPT_NAME': '',
+        # WSGI: decoded path, bytes as latin-1
+        'PATH_INFO': unquote_to_bytes(path).decode('latin-1'),
+        'QUERY_STRING': query_string,
+        'CONTENT_TYPE': headers.get('content-type', ''),
+        'CONTENT_LENGTH': str(len(body)) if body else '',
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': server_port or ('443' if scheme == 'https' else '80'),
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scheme,
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for key, value in headers.items():
+        key = key.upper().replace('-', '_')
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[f'HTTP_{key}'] = value
+    return environ
+
+
+def is_text(headers):
+    """True if the body can be returned as a UTF-8 string"""
+    if headers.get('content-encoding', 'identity') != 'identity':
+        return False
+    content_type, *params = headers.get('content-type', '').split(';')
+    content_type = content_type.strip().lower()
+    if not (content_type.startswith('text/') or content_type in TEXT_CONTENT_TYPES
+            or content_type.endswith(('+json', '+xml'))):
+        return False
+    for param in params:
+        name, _, value = param.partition('=')
+        if name.strip().lower() == 'charset':
+            return value.strip().strip('"').lower() in TEXT_CHARSETS
+    return True
+
+
+def run_application(environ):
+    """Call the WSGI application; return (status, headers list, body bytes)"""
+    response = {'status': 500, 'headers': []}
+    chunks = []
+
+    def start_response(status, headers_list, exc_info=None):
+        # Nothing is sent before the end: an error response replaces the headers
+        response['status'] = int(str(status).split(None, 1)[0])
+        response['headers'] = headers_list
+        return chunks.append
+
+    result = application(environ, start_response)
+    try:
+        for chunk in result:
+            if chunk:
+                chunks.append(chunk)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+
+    # A single chunk is used as is; otherwise one buffer is filled
+    if len(chunks) == 1:
+        body = chunks[0]
+    else:
+        body = bytearray()
+        for chunk in chunks:
+            body += chunk
+        chunks.clear()
+    return response['status'], response['headers'], body
+
+
+def build_response(status, headers_list, body):
+    headers = {}
+    for name, value in headers_list:
+        name = str(name).lower()
+        # Django's WSGI handler sends Set-Cookie values with a leading space
+        value = str(value).strip()
+        if name not in headers:
+            headers[name] = value
+        elif isinstance(headers[name], list):
+            headers[name].append(value)
+        else:
+            headers[name] = [headers[name], value]
+
+    if is_text(headers):
+        try:
+            return {
+                'statusCode': status,
+                'headers': headers,
+                'body': body.decode('utf-8'),
+                'isBase64Encoded': False,
+            }
+        except UnicodeDecodeError:
+            pass
+    return {
+        'statusCode': status,
+        'headers': headers,
+        'body': base64.b64encode(body).decode('ascii'),
+        'isBase64Encoded': True,
+        'encoding': 'base64',
+    }
+
+
+def report_cold_start(response, request_start):
+    """Log the cold-start phases and add them to the response Server-Timing"""
+    mark('first_request', request_start)
+    COLD_START['total'] = (time.perf_counter() - START) * 1000
+    sys.stderr.write(
+        'cold start: ' + ', '.join(f'{phase} {ms:.1f}ms' for phase, ms in COLD_START.items())
+        + f" (public_only={os.environ.get('DJANGO_PUBLIC_ONLY')})\n"
+    )
+    timing = ', '.join(f'cold-{phase};dur={ms:.1f}' for phase, ms in COLD_START.items())
+    headers = response['headers']
+    existing = headers.get('server-timing')
+    if isinstance(existing, list):
+        existing.append(timing)
+    elif existing:
+        headers['server-timing'] = f'{existing}, {timing}'
+    else:
+        headers['server-timing'] = timing
+
+
 def handler(request):
     """
     Vercel serverless function handler for Django WSGI
@@ -77,134 +290,15 @@ def handler(request):
             'headers': {'content-type': 'text/html; charset=utf-8'},
             'body': error_html
         }
-    
+
+    global cold_start_pending
+    cold_start = cold_start_pending
+    cold_start_pending = False
+    start = time.perf_counter() if LOG_REQUESTS or cold_start else 0
     try:
-        # Log request info
-        print(f"Request received: {type(request)}", file=sys.stderr)
-        
-        # Extract request data - Vercel Python Request object
-        method = getattr(request, 'method', 'GET')
-        path = getattr(request, 'path', '/')
-        
-        # Try to get URL if path is not available
-        if path == '/' and hasattr(request, 'url'):
-            from urllib.parse import urlparse
-            parsed = urlparse(request.url)
-            path = parsed.path or '/'
-        
-        print(f"Method: {method}, Path: {path}", file=sys.stderr)
-        
-        # Get headers
-        headers = {}
-        if hasattr(request, 'headers'):
-            try:
-                if isinstance(request.headers, dict):
-                    headers = request.headers
-                elif hasattr(request.headers, 'items'):
-                    headers = dict(request.headers.items())
-                else:
-                    headers = dict(request.headers)
-            except Exception as e:
-                print(f"Error reading headers: {e}", file=sys.stderr)
-        
-        # Get body
-        body = b''
-        if hasattr(request, 'body'):
-            if request.body:
-                if isinstance(request.body, bytes):
-                    body = request.body
-                elif isinstance(request.body, str):
-                    body = request.body.encode('utf-8')
-        
-        # Get query string
-        query_string = ''
-        if hasattr(request, 'query') and request.query:
-            query_parts = []
-            if isinstance(request.query, dict):
-                for k, v in request.query.items():
-                    if isinstance(v, list):
-                        for val in v:
-                            query_parts.append(f'{k}={val}')
-                    else:
-                        query_parts.append(f'{k}={v}')
-            query_string = '&'.join(query_parts)
-        elif hasattr(request, 'url') and '?' in request.url:
-            query_string = request.url.split('?', 1)[1]
-        
-        # Build WSGI environ
-        host = headers.get('host', headers.get('Host', 'localhost'))
-        if isinstance(host, list):
-            host = host[0] if host else 'localhost'
-        host_str = str(host)
-        server_name = host_str.split(':')[0] if ':' in host_str else host_str
-        server_port = host_str.split(':')[1] if ':' in host_str else '80'
-        
-        environ = {
-            'REQUEST_METHOD': str(method),
-            'SCRIPT_NAME': '',
-            'PATH_INFO': str(path),
-            'QUERY_STRING': str(query_string),
-            'CONTENT_TYPE': str(headers.get('content-type', headers.get('Content-Type', ''))),
-            'CONTENT_LENGTH': str(len(body)) if body else '',
-            'SERVER_NAME': server_name,
-            'SERVER_PORT': server_port,
-            'SERVER_PROTOCOL': 'HTTP/1.1',
-            'wsgi.version': (1, 0),
-            'wsgi.url_scheme': 'https' if headers.get('x-forwarded-proto', headers.get('X-Forwarded-Proto', '')) == 'https' else 'http',
-            'wsgi.input': BytesIO(body) if body else BytesIO(),
-            'wsgi.errors': sys.stderr,
-            'wsgi.multithread': False,
-            'wsgi.multiprocess': True,
-            'wsgi.run_once': False,
-        }
-        
-        # Add HTTP headers to environ
-        for key, value in headers.items():
-            key_upper = str(key).upper().replace('-', '_')
-            if key_upper not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
-                environ[f'HTTP_{key_upper}'] = str(value)
-        
-        # Response storage
-        response_status = 200
-        response_headers_list = []
-        
-        def start_response(status, headers_list):
-            nonlocal response_status, response_headers_list
-            response_status = int(str(status).split()[0])
-            response_headers_list = headers_list
-        
-        # Call WSGI application
-        print("Calling WSGI application...", file=sys.stderr)
-        result = application(environ, start_response)
-        print(f"WSGI application returned, status: {response_status}", file=sys.stderr)
-        
-        # Collect response body
-        body_parts = []
-        for part in result:
-            if isinstance(part, bytes):
-                body_parts.append(part)
-            else:
-                body_parts.append(str(part).encode('utf-8'))
-        
-        if hasattr(result, 'close'):
-            result.close()
-        
-        body_bytes = b''.join(body_parts)
-        
-        # Convert headers to dict (Vercel format - lowercase keys)
-        response_headers_dict = {}
-        for header, value in response_headers_list:
-            response_headers_dict[str(header).lower()] = str(value)
-        
-        print(f"Returning response, status: {response_status}, body length: {len(body_bytes)}", file=sys.stderr)
-        
-        # Return Vercel response format
-        return {
-            'statusCode': response_status,
-            'headers': response_headers_dict,
-            'body': body_bytes.decode('utf-8', errors='ignore')
-        }
-        
+        environ = build_environ(request)
+        status, headers_list, body = run_application(environ)
+        response = build_response(status, headers_list, body)
     except Exception as e:
         # Error handling with detailed traceback
         import traceback
@@ -218,3 +312,12 @@ def handler(request):
                 <pre>{error_msg}</pre>
             </body></html>'''
         }
+
+    if cold_start:
+        report_cold_start(response, start)
+    if LOG_REQUESTS:
+        sys.stderr.write(
+            f"{environ['REQUEST_METHOD']} {environ['PATH_INFO']} {status} "
+            f"{len(body)}B {(time.perf_counter() - start) * 1000:.1f}ms\n"
+        )
+    return response
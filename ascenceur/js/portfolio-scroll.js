@@ -0,0 +1,78 @@
+/**
+ * Défilement infini du portfolio des projets
+ * Charge la page suivante (fragment JSON) quand le bouton "Voir plus" devient visible.
+ * Sans JavaScript, le bouton reste un lien vers la page suivante.
+ */
+
+(function() {
+    'use strict';
+
+    const grid = document.getElementById('portfolio-grid');
+    const button = document.getElementById('portfolio-suivant');
+    if (!grid || !button || !button.dataset.fragment) {
+        return;
+    }
+
+    let loading = false;
+
+    /**
+     * Ajoute les cartes de la page suivante et met à jour le bouton
+     */
+    function loadNext() {
+        const url = button.dataset.fragment;
+        if (loading || !url) {
+            return;
+        }
+        loading = true;
+
+        fetch(url, { headers: { 'Accept': 'application/json' } })
+            .then(function(response) {
+                if (!response.ok) {
+                    throw new Error(response.status);
+                }
+                return response.json();
+            })
+            .then(function(data) {
+                grid.insertAdjacentHTML('beforeend', data.html);
+                if (data.suivant) {
+                    button.dataset.fragment = data.suivant;
+                    button.href = data.page_suivante;
+                } else {
+                    if (observer) {
+                        observer.disconnect();
+                    }
+                    button.remove();
+                }
+            })
+            .catch(function() {
+                // En cas d'erreur, le bouton redevient un lien classique vers la page suivante
+                delete button.dataset.fragment;
+                if (observer) {
+                    observer.disconnect();
+                }
+            })
+            .finally(function() {
+                loading = false;
+            });
+    }
+
+    button.addEventListener('click', function(event) {
+        if (!button.dataset.fragment) {
+            return;
+        }
+        event.preventDefault();
+        loadNext();
+    });
+
+    const observer = 'IntersectionObserver' in window
+        ? new IntersectionObserver(function(entries) {
+            if (entries.some(function(entry) { return entry.isIntersecting; })) {
+                loadNext();
+            }
+        }, { rootMargin: '400px' })
+        : null;
+
+    if (observer) {
+        observer.observe(button);
+    }
+})();
@@ -0,0 +1,48 @@
+"""
+Versions asynchrones des vues du blog (mode ASGI, settings.ASYNC_VIEWS)
+
+Mêmes pages que blog.views : les requêtes indépendantes (sidebar, articles
+similaires, précédent/suivant) sont exécutées en même temps, et le worker
+continue de servir les autres connexions pendant les accès à la base.
+"""
+from django.shortcuts import render
+from liftandlight.async_utils import run_parallel, run_sync
+from liftandlight.compression import precompressed_page
+from .views import (
+    get_article, get_article_context, get_articles_similaires, get_categorie,
+    get_liste_context, get_page_articles, get_precedent_suivant, get_sidebar,
+)
+
+
+def render_page(request, template_name, get_context, *args):
+    """Contexte (qui lit la version du cache) et rendu, dans le thread de la requête"""
+    return render(request, template_name, get_context(*args))
+
+
+@precompressed_page
+async def liste_articles(request, categorie=None):
+    """Affiche la liste de tous les articles publiés"""
+    categorie_obj = await run_sync(get_categorie, categorie)
+    page_obj, sidebar = await run_parallel(
+        (get_page_articles, request, categorie_obj),
+        (get_sidebar,),
+    )
+    return await run_sync(
+        render_page, request, 'blog/liste_articles.html',
+        get_liste_context, page_obj, categorie_obj, sidebar,
+    )
+
+
+@precompressed_page
+async def article_detail(request, slug):
+    """Affiche le détail d'un article ; sidebar, similaires et voisins en parallèle"""
+    article = await run_sync(get_article, slug)
+    sidebar, articles_similaires, precedent_suivant = await run_parallel(
+        (get_sidebar,),
+        (get_articles_similaires, article),
+        (get_precedent_suivant, article),
+    )
+    return await run_sync(
+        render_page, request, 'blog/article_detail.html',
+        get_article_context, article, sidebar, articles_similaires, precedent_suivant,
+    )
@@ -0,0 +1,16 @@
+"""
+Cache des données du blog (listes d'articles, sidebar...)
+
+Invalidé par les signaux de blog.signals à chaque modification d'un
+Article ou d'une CategorieArticle (voir liftandlight.versioned_cache).
+"""
+from liftandlight.versioned_cache import VersionedCache
+
+
+_cache = VersionedCache('blog')
+
+get_version = _cache.get_version
+invalidate = _cache.invalidate
+invalidate_on_commit = _cache.invalidate_on_commit
+make_key = _cache.make_key
+get_or_build = _cache.get_or_build
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from blog import view_counter
+
+
+class Command(BaseCommand):
+    help = 'Écrit en base les vues d\'articles en attente dans le buffer du compteur'
+
+    def handle(self, *args, **options):
+        count = view_counter.flush()
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ {count} vues écrites en base')
+        )
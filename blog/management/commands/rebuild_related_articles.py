@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from blog import related
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit entièrement l\'index des articles similaires'
+
+    def handle(self, *args, **options):
+        count = related.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Index reconstruit : {count} liens')
+        )
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleSimilaire',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('categories_communes', models.PositiveIntegerField(verbose_name='Catégories communes')),
+                ('date_publication', models.DateTimeField(verbose_name='Date de publication du similaire')),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similaires_index', to='blog.article')),
+                ('similaire', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.article')),
+            ],
+            options={
+                'verbose_name': 'Article similaire',
+                'verbose_name_plural': 'Articles similaires',
+                'ordering': ['-categories_communes', '-date_publication'],
+                'indexes': [models.Index(fields=['article', '-categories_communes', '-date_publication'], name='blog_similaire_rang_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='articlesimilaire',
+            constraint=models.UniqueConstraint(fields=('article', 'similaire'), name='unique_article_similaire'),
+        ),
+    ]
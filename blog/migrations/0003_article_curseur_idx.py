@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_article_similaire'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['publie', '-date_publication', '-id'], name='blog_article_curseur_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_article_curseur_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='image_principale_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name="Déclinaisons de l'image"),
+        ),
+    ]
@@ -34,6 +34,8 @@ class Article(models.Model):
     contenu = models.TextField(verbose_name="Contenu")
     resume = models.TextField(max_length=500, help_text="Résumé court de l'article (max 500 caractères)", verbose_name="Résumé")
     image_principale = models.ImageField(upload_to='blog/', blank=True, null=True, verbose_name="Image principale")
+    # Déclinaisons responsive de l'image (voir liftandlight.renditions)
+    image_principale_renditions = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Déclinaisons de l'image")
     categories = models.ManyToManyField(CategorieArticle, related_name='articles', blank=True, verbose_name="Catégories")
     date_publication = models.DateTimeField(auto_now_add=True, verbose_name="Date de publication")
     date_modification = models.DateTimeField(auto_now=True, verbose_name="Date de modification")
@@ -44,6 +46,10 @@ class Article(models.Model):
         ordering = ['-date_publication']
         verbose_name = 'Article'
         verbose_name_plural = 'Articles'
+        indexes = [
+            # Pagination par curseur de la liste des articles (blog.pagination)
+            models.Index(fields=['publie', '-date_publication', '-id'], name='blog_article_curseur_idx'),
+        ]
     
     def __str__(self):
         return self.titre
@@ -57,6 +63,39 @@ class Article(models.Model):
         return reverse('blog:article_detail', kwargs={'slug': self.slug})
     
     def increment_vue(self):
-        """Incrémente le compteur de vues"""
+        """
+        Incrémente le compteur de vues. L'écriture en base est bufferisée
+        (voir blog.view_counter) ; seule l'instance est mise à jour ici.
+        """
+        from .view_counter import record_view
+        record_view(self.pk)
         self.vue += 1
-        self.save(update_fields=['vue'])
+
+
+class ArticleSimilaire(models.Model):
+    """
+    Index précalculé des articles similaires : pour chaque article, ses
+    meilleurs voisins classés par catégories communes puis par date.
+    Maintenu par blog.related (signaux et commande rebuild_related_articles).
+    """
+    article = models.ForeignKey(Article, related_name='similaires_index', on_delete=models.CASCADE)
+    similaire = models.ForeignKey(Article, related_name='+', on_delete=models.CASCADE)
+    categories_communes = models.PositiveIntegerField(verbose_name="Catégories communes")
+    date_publication = models.DateTimeField(verbose_name="Date de publication du similaire")
+    
+    class Meta:
+        ordering = ['-categories_communes', '-date_publication']
+        verbose_name = 'Article similaire'
+        verbose_name_plural = 'Articles similaires'
+        constraints = [
+            models.UniqueConstraint(fields=['article', 'similaire'], name='unique_article_similaire'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['article', '-categories_communes', '-date_publication'],
+                name='blog_similaire_rang_idx',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.article} → {self.similaire}"
@@ -0,0 +1,124 @@
+"""
+Pagination par curseur (keyset) pour la liste des articles
+
+Les pages sont ordonnées sur (date_publication, id) décroissants. Au lieu
+d'un COUNT(*) et d'un OFFSET, chaque page est lue à partir de la position
+du dernier (ou du premier) article de la page voisine, transmise dans un
+jeton opaque ?curseur=... Les anciens liens ?page=N passent par le
+Paginator de Django puis continuent en mode curseur.
+"""
+import base64
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+
+# Sens de lecture encodés dans le jeton
+APRES = 'a'
+AVANT = 'b'
+
+
+def encode_cursor(direction, article):
+    """Jeton opaque désignant la position d'un article dans la liste"""
+    raw = f'{direction}{article.date_publication.isoformat()}|{article.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Retourne (sens, date, id) depuis un jeton, ou None s'il est invalide"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        direction, rest = raw[0], raw[1:]
+        date, pk = rest.rsplit('|', 1)
+        if direction not in (APRES, AVANT):
+            return None
+        return direction, datetime.fromisoformat(date), int(pk)
+    except (ValueError, IndexError, UnicodeDecodeError):
+        return None
+
+
+class CursorPage:
+    """Page de résultats, avec les jetons des pages voisines"""
+
+    def __init__(self, object_list, has_previous, has_next):
+        self.object_list = object_list
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    def has_other_pages(self):
+        return self._has_previous or self._has_next
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return encode_cursor(AVANT, self.object_list[0])
+        return None
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return encode_cursor(APRES, self.object_list[-1])
+        return None
+
+
+class CursorPaginator:
+    """
+    Pagine un QuerySet d'articles par curseur sur (date_publication, id).
+    Une page coûte une seule requête (per_page + 1 lignes, sans COUNT).
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def get_page(self, token=None):
+        cursor = decode_cursor(token) if token else None
+        if cursor is None:
+            return self._first_page()
+
+        direction, date, pk = cursor
+        if direction == APRES:
+            rows = list(
+                self.queryset
+                .filter(Q(date_publication__lt=date) | Q(date_publication=date, pk__lt=pk))
+                .order_by('-date_publication', '-pk')[:self.per_page + 1]
+            )
+            return CursorPage(rows[:self.per_page], True, len(rows) > self.per_page)
+
+        rows = list(
+            self.queryset
+            .filter(Q(date_publication__gt=date) | Q(date_publication=date, pk__gt=pk))
+            .order_by('date_publication', 'pk')[:self.per_page + 1]
+        )
+        if len(rows) <= self.per_page:
+            # Début de la liste atteint : renvoyer la première page complète
+            return self._first_page()
+        page = rows[:self.per_page]
+        page.reverse()
+        return CursorPage(page, True, True)
+
+    def _first_page(self):
+        rows = list(self.queryset.order_by('-date_publication', '-pk')[:self.per_page + 1])
+        return CursorPage(rows[:self.per_page], False, len(rows) > self.per_page)
+
+    def get_legacy_page(self, number):
+        """Compatibilité ?page=N : pagination classique (COUNT + OFFSET)"""
+        paginator = Paginator(self.queryset.order_by('-date_publication', '-pk'), self.per_page)
+        page = paginator.get_page(number)
+        return CursorPage(list(page.object_list), page.has_previous(), page.has_next())
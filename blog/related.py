@@ -0,0 +1,151 @@
+"""
+Maintenance de l'index des articles similaires (ArticleSimilaire)
+
+Deux articles sont similaires s'ils partagent au moins une catégorie ; ils
+sont classés par nombre de catégories communes, puis du plus récent au plus
+ancien. Seuls les SIMILAIRES_PAR_ARTICLE meilleurs voisins publiés sont
+gardés, et seulement pour les articles publiés.
+
+L'index est mis à jour article par article depuis les signaux (voir
+blog.signals) et reconstruit entièrement avec
+`manage.py rebuild_related_articles`.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import Article, ArticleSimilaire
+
+
+# Nombre de voisins gardés par article (la page en affiche 3)
+SIMILAIRES_PAR_ARTICLE = 6
+
+# Taille des lots de la reconstruction complète
+TAILLE_LOT = 200
+
+
+def candidate_scores(article_ids):
+    """
+    Retourne {article_id: {similaire_id: (catégories communes, date)}} pour
+    les articles donnés, en une seule requête sur la table des catégories.
+    """
+    through = Article.categories.through
+    rows = (
+        through.objects
+        .filter(article_id__in=article_ids, categoriearticle__articles__publie=True)
+        .values(
+            'article_id',
+            'categoriearticle__articles',
+            'categoriearticle__articles__date_publication',
+        )
+        .annotate(communes=Count('pk'))
+        .order_by()
+    )
+    scores = defaultdict(dict)
+    for row in rows:
+        similaire_id = row['categoriearticle__articles']
+        if similaire_id == row['article_id']:
+            continue
+        scores[row['article_id']][similaire_id] = (
+            row['communes'],
+            row['categoriearticle__articles__date_publication'],
+        )
+    return scores
+
+
+def _best(candidates):
+    """Garde les meilleurs candidats {id: (communes, date)} dans l'ordre du classement"""
+    ranked = sorted(candidates.items(), key=lambda item: (item[1], item[0]), reverse=True)
+    return ranked[:SIMILAIRES_PAR_ARTICLE]
+
+
+def _rows(article_id, candidates):
+    return [
+        ArticleSimilaire(
+            article_id=article_id,
+            similaire_id=similaire_id,
+            categories_communes=communes,
+            date_publication=date,
+        )
+        for similaire_id, (communes, date) in _best(candidates)
+    ]
+
+
+def recompute(article_ids):
+    """Recalcule entièrement la liste des articles donnés"""
+    article_ids = list(article_ids)
+    if not article_ids:
+        return
+    publies = list(Article.objects.filter(pk__in=article_ids, publie=True).values_list('pk', flat=True))
+    scores = candidate_scores(publies)
+    with transaction.atomic():
+        ArticleSimilaire.objects.filter(article_id__in=article_ids).delete()
+        rows = []
+        for article_id in publies:
+            rows.extend(_rows(article_id, scores.get(article_id, {})))
+        ArticleSimilaire.objects.bulk_create(rows)
+
+
+def update_article(article):
+    """
+    Met à jour l'index après la modification d'un article : sa propre liste,
+    et sa place dans la liste des articles qui partagent une catégorie avec
+    lui. Seules les listes où l'article recule ou disparaît sont recalculées.
+    """
+    with transaction.atomic():
+        # Listes qui contenaient l'article, avec son ancien classement
+        anciens = {
+            row.article_id: (row.categories_communes, row.date_publication)
+            for row in ArticleSimilaire.objects.filter(similaire_id=article.pk)
+        }
+        ArticleSimilaire.objects.filter(
+            Q(article_id=article.pk) | Q(similaire_id=article.pk)
+        ).delete()
+
+        candidats = candidate_scores([article.pk]).get(article.pk, {}) if article.publie else {}
+        rows = _rows(article.pk, candidats)
+
+        voisins = set(candidats) | set(anciens)
+        listes = defaultdict(list)
+        for row in ArticleSimilaire.objects.filter(article_id__in=voisins):
+            listes[row.article_id].append(row)
+
+        a_recalculer = []
+        a_supprimer = []
+        for voisin_id in voisins:
+            if voisin_id not in candidats:
+                # L'article a quitté la liste : un autre candidat doit le remplacer
+                a_recalculer.append(voisin_id)
+                continue
+            cle = (candidats[voisin_id][0], article.date_publication)
+            if voisin_id in anciens and cle < anciens[voisin_id]:
+                # L'article recule : un candidat hors liste peut le dépasser
+                a_recalculer.append(voisin_id)
+                continue
+            liste = listes[voisin_id]
+            if len(liste) >= SIMILAIRES_PAR_ARTICLE:
+                dernier = min(liste, key=lambda r: ((r.categories_communes, r.date_publication), r.similaire_id))
+                if (cle, article.pk) <= ((dernier.categories_communes, dernier.date_publication), dernier.similaire_id):
+                    continue
+                a_supprimer.append(dernier.pk)
+            rows.append(ArticleSimilaire(
+                article_id=voisin_id,
+                similaire_id=article.pk,
+                categories_communes=cle[0],
+                date_publication=cle[1],
+            ))
+
+        ArticleSimilaire.objects.filter(pk__in=a_supprimer).delete()
+        ArticleSimilaire.objects.bulk_create(rows)
+        recompute(a_recalculer)
+
+
+def rebuild():
+    """Reconstruit tout l'index ; retourne le nombre de lignes créées"""
+    article_ids = list(Article.objects.filter(publie=True).values_list('pk', flat=True))
+    with transaction.atomic():
+        ArticleSimilaire.objects.all().delete()
+        for start in range(0, len(article_ids), TAILLE_LOT):
+            recompute(article_ids[start:start + TAILLE_LOT])
+    return ArticleSimilaire.objects.count()
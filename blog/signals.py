@@ -0,0 +1,70 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from liftandlight import renditions
+
+from . import caching, related
+from .models import Article, ArticleSimilaire, CategorieArticle
+
+
+@receiver(post_save, sender=Article)
+def update_article_renditions(sender, instance, raw=False, **kwargs):
+    """Génère les déclinaisons responsive d'une nouvelle image principale"""
+    if not raw:
+        renditions.update_field(instance, 'image_principale')
+
+
+@receiver(post_delete, sender=Article)
+def delete_article_renditions(sender, instance, **kwargs):
+    renditions.delete(instance.image_principale_renditions, instance.image_principale.storage)
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+@receiver(post_save, sender=CategorieArticle)
+@receiver(post_delete, sender=CategorieArticle)
+@receiver(m2m_changed, sender=Article.categories.through)
+def invalidate_blog_cache(sender, **kwargs):
+    """Invalide le cache du blog à chaque modification d'article ou de catégorie"""
+    if kwargs.get('action', 'post_').startswith('post_'):
+        caching.invalidate_on_commit()
+
+
+@receiver(post_save, sender=Article)
+def update_related_on_save(sender, instance, raw=False, **kwargs):
+    """Met à jour l'index des articles similaires (publication, date...)"""
+    if not raw:
+        related.update_article(instance)
+
+
+@receiver(m2m_changed, sender=Article.categories.through)
+def update_related_on_categories(sender, instance, action, reverse, pk_set, **kwargs):
+    """Met à jour l'index quand les catégories d'un article changent"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        related.update_article(instance)
+    elif pk_set is None:
+        # Catégorie vidée de tous ses articles
+        related.rebuild()
+    else:
+        for article in Article.objects.filter(pk__in=pk_set):
+            related.update_article(article)
+
+
+@receiver(pre_delete, sender=Article)
+def update_related_on_delete(sender, instance, **kwargs):
+    """Les listes qui contenaient l'article supprimé sont recalculées ensuite"""
+    holders = list(
+        ArticleSimilaire.objects
+        .filter(similaire_id=instance.pk)
+        .values_list('article_id', flat=True)
+    )
+    transaction.on_commit(lambda: related.recompute(holders))
+
+
+@receiver(post_delete, sender=CategorieArticle)
+def rebuild_related_on_category_delete(sender, **kwargs):
+    """La suppression d'une catégorie retire ses liens sans signal m2m"""
+    transaction.on_commit(related.rebuild)
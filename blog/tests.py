@@ -1,3 +1,270 @@
-from django.test import TestCase
+import base64
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from . import caching, related, view_counter
+from .models import Article, ArticleSimilaire, CategorieArticle
+from .pagination import APRES, AVANT, CursorPaginator, decode_cursor, encode_cursor
+
+
+def make_token(raw):
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+class CursorTokenTests(SimpleTestCase):
+    def test_round_trip(self):
+        date = datetime(2024, 3, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)
+        article = Article(pk=42, date_publication=date)
+        for direction in (APRES, AVANT):
+            token = encode_cursor(direction, article)
+            self.assertNotIn('=', token)
+            self.assertEqual(decode_cursor(token), (direction, date, 42))
+
+    def test_bad_tokens(self):
+        for token in (
+            '',
+            '!!!',
+            'bm9wZQ',  # "nope" : pas de séparateur
+            make_token('x2024-03-01T12:00:00+00:00|1'),  # sens inconnu
+            make_token('a2024-03-01T12:00:00+00:00|abc'),  # id non numérique
+            make_token('apas une date|1'),
+            base64.urlsafe_b64encode(b'\xff\xfe|1').decode(),  # pas de l'UTF-8
+        ):
+            with self.subTest(token=token):
+                self.assertIsNone(decode_cursor(token))
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        # Deux articles par date : l'ordre dépend aussi de l'id
+        for i in range(7):
+            article = Article.objects.create(titre=f'Article {i}', contenu='.', resume='.')
+            Article.objects.filter(pk=article.pk).update(date_publication=base + timedelta(days=i // 2))
+        cls.expected = list(
+            Article.objects.order_by('-date_publication', '-pk').values_list('pk', flat=True)
+        )
+
+    def setUp(self):
+        self.paginator = CursorPaginator(Article.objects.all(), per_page=3)
+
+    def ids(self, page):
+        return [article.pk for article in page]
+
+    def test_walk_forward_and_back(self):
+        first = self.paginator.get_page()
+        self.assertEqual(self.ids(first), self.expected[:3])
+        self.assertFalse(first.has_previous())
+        self.assertIsNone(first.previous_cursor)
+
+        second = self.paginator.get_page(first.next_cursor)
+        self.assertEqual(self.ids(second), self.expected[3:6])
+        self.assertTrue(second.has_previous() and second.has_next())
+
+        last = self.paginator.get_page(second.next_cursor)
+        self.assertEqual(self.ids(last), self.expected[6:])
+        self.assertFalse(last.has_next())
+        self.assertIsNone(last.next_cursor)
+
+        back = self.paginator.get_page(last.previous_cursor)
+        self.assertEqual(self.ids(back), self.expected[3:6])
+        self.assertTrue(back.has_previous())
+
+    def test_back_to_start_returns_full_first_page(self):
+        # Avant le 2e article : moins d'une page, la première page est renvoyée
+        article = Article.objects.get(pk=self.expected[1])
+        page = self.paginator.get_page(encode_cursor(AVANT, article))
+        self.assertEqual(self.ids(page), self.expected[:3])
+        self.assertFalse(page.has_previous())
+
+    def test_bad_token_returns_first_page(self):
+        page = self.paginator.get_page('pas-un-jeton')
+        self.assertEqual(self.ids(page), self.expected[:3])
+        self.assertFalse(page.has_previous())
+
+    def test_one_query_per_page(self):
+        first = self.paginator.get_page()
+        with self.assertNumQueries(1):
+            list(self.paginator.get_page(first.next_cursor))
+
+    def test_legacy_page(self):
+        page = self.paginator.get_legacy_page(3)
+        self.assertEqual(self.ids(page), self.expected[6:])
+        self.assertTrue(page.has_previous())
+        self.assertFalse(page.has_next())
+
+
+class ViewCounterSpoolTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.article = Article.objects.create(titre='Compté', contenu='.', resume='.')
+
+    def setUp(self):
+        spool = tempfile.TemporaryDirectory()
+        self.addCleanup(spool.cleanup)
+        self.spool_dir = spool.name
+        patcher = override_settings(VIEW_COUNTER_SPOOL_DIR=self.spool_dir)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+    def spool(self, name, count):
+        path = os.path.join(self.spool_dir, name)
+        with open(path, 'w') as f:
+            json.dump({str(self.article.pk): count}, f)
+        return path
+
+    def views(self):
+        return Article.objects.get(pk=self.article.pk).vue
+
+    def test_flush_applies_and_removes_spool_files(self):
+        self.spool('1-1.json', 2)
+        self.spool('2-1.json', 3)
+        self.assertEqual(view_counter.flush(), 5)
+        self.assertEqual(self.views(), 5)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_recent_claim_is_left_alone(self):
+        # Fichier déposé il y a longtemps, réclamé à l'instant par un autre worker
+        path = self.spool(f'1-1.json.999-{time.time_ns()}.flushing', 4)
+        old = time.time() - 10 * view_counter.STALE_CLAIM_SECONDS
+        os.utime(path, (old, old))
+        self.assertEqual(view_counter.flush(), 0)
+        self.assertEqual(os.listdir(self.spool_dir), [os.path.basename(path)])
+        self.assertEqual(self.views(), 0)
+
+    def test_stale_claim_is_requeued(self):
+        claimed_at = time.time_ns() - (view_counter.STALE_CLAIM_SECONDS + 60) * 10 ** 9
+        self.spool(f'1-1.json.999-{claimed_at}.flushing', 4)
+        view_counter.flush()
+        self.assertEqual(os.listdir(self.spool_dir), ['1-1.json'])
+        self.assertEqual(view_counter.flush(), 4)
+        self.assertEqual(self.views(), 4)
+
+    def test_failed_write_requeues_claimed_files(self):
+        self.spool('1-1.json', 2)
+        with mock.patch.object(view_counter, 'apply_counts', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                view_counter.flush()
+        self.assertEqual(os.listdir(self.spool_dir), ['1-1.json'])
+        self.assertEqual(view_counter.flush(), 2)
+
+    def test_claim_requeued_by_another_worker(self):
+        self.spool('1-1.json', 2)
+
+        def requeue(counts):
+            # Un autre worker remet le fichier en attente pendant l'écriture
+            for name in os.listdir(self.spool_dir):
+                os.replace(os.path.join(self.spool_dir, name), os.path.join(self.spool_dir, '1-1.json'))
+
+        with mock.patch.object(view_counter, 'apply_counts', side_effect=requeue):
+            self.assertEqual(view_counter.flush(), 2)
+        self.assertEqual(os.listdir(self.spool_dir), ['1-1.json'])
+
+
+class RelatedIndexTests(TestCase):
+    """Après chaque modification, l'index incrémental égale une reconstruction"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.a, cls.b, cls.c = (
+            CategorieArticle.objects.create(nom=nom) for nom in ('Ascenseurs', 'Climatisation', 'Électricité')
+        )
+
+    def index(self):
+        return sorted(ArticleSimilaire.objects.values_list(
+            'article_id', 'similaire_id', 'categories_communes', 'date_publication',
+        ))
+
+    def assertIndexMatchesRebuild(self):
+        incremental = self.index()
+        related.rebuild()
+        self.assertEqual(incremental, self.index())
+
+    def step(self):
+        # Certains récepteurs n'agissent qu'après le COMMIT
+        return self.captureOnCommitCallbacks(execute=True)
+
+    def create(self, titre, *categories):
+        with self.step():
+            article = Article.objects.create(titre=titre, contenu='.', resume='.')
+            article.categories.add(*categories)
+        return article
+
+    def test_incremental_maintenance(self):
+        # Plus de voisins que SIMILAIRES_PAR_ARTICLE dans la catégorie a
+        articles = [
+            self.create(f'Article {i}', self.a, *([self.b] if i % 2 else []), *([self.c] if i % 3 == 0 else []))
+            for i in range(related.SIMILAIRES_PAR_ARTICLE + 4)
+        ]
+        self.assertIndexMatchesRebuild()
+        self.assertTrue(ArticleSimilaire.objects.exists())
+        premier, second, troisieme = articles[:3]
+
+        with self.step():
+            premier.publie = False
+            premier.save()
+        self.assertIndexMatchesRebuild()
+        self.assertFalse(ArticleSimilaire.objects.filter(similaire=premier).exists())
+
+        with self.step():
+            premier.publie = True
+            premier.save()
+        self.assertIndexMatchesRebuild()
+
+        with self.step():
+            second.categories.add(self.b, self.c)
+        self.assertIndexMatchesRebuild()
+
+        with self.step():
+            second.categories.remove(self.a)
+        self.assertIndexMatchesRebuild()
+
+        with self.step():
+            troisieme.categories.clear()
+        self.assertIndexMatchesRebuild()
+
+        # Côté catégorie (m2m inversé)
+        with self.step():
+            self.c.articles.add(troisieme, premier)
+        self.assertIndexMatchesRebuild()
+
+        with self.step():
+            self.b.articles.remove(articles[3])
+        self.assertIndexMatchesRebuild()
+
+        with self.step():
+            self.b.articles.clear()
+        self.assertIndexMatchesRebuild()
+
+        with self.step():
+            articles[4].delete()
+        self.assertIndexMatchesRebuild()
+
+        with self.step():
+            self.c.delete()
+        self.assertIndexMatchesRebuild()
+
+
+class CacheInvalidationTests(TestCase):
+    """La version du cache du blog ne change qu'après le COMMIT"""
+
+    def assertInvalidatedOnCommit(self, change):
+        version = caching.get_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+            self.assertEqual(caching.get_version(), version)
+        self.assertNotEqual(caching.get_version(), version)
+
+    def test_save_and_delete(self):
+        article = Article(titre='Invalidé', contenu='.', resume='.')
+        self.assertInvalidatedOnCommit(article.save)
+        categorie = CategorieArticle.objects.create(nom='Ascenseurs')
+        self.assertInvalidatedOnCommit(lambda: article.categories.add(categorie))
+        self.assertInvalidatedOnCommit(article.delete)
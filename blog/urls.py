@@ -1,11 +1,15 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Mode ASGI : versions async des vues
+vues = async_views if settings.ASYNC_VIEWS else views
 
 app_name = 'blog'
 
 urlpatterns = [
-    path('', views.liste_articles, name='liste_articles'),
-    path('categorie/<slug:categorie>/', views.liste_articles, name='liste_articles_categorie'),
-    path('<slug:slug>/', views.article_detail, name='article_detail'),
+    path('', vues.liste_articles, name='liste_articles'),
+    path('categorie/<slug:categorie>/', vues.liste_articles, name='liste_articles_categorie'),
+    path('<slug:slug>/', vues.article_detail, name='article_detail'),
 ]
 
@@ -0,0 +1,185 @@
+"""
+Compteur de vues des articles, bufferisé
+
+Les vues sont comptées en mémoire par processus (worker) au lieu d'un
+save() par page vue. Toutes les VIEW_COUNTER_FLUSH_INTERVAL secondes, un
+thread du worker dépose les compteurs dans un dossier partagé local
+(VIEW_COUNTER_SPOOL_DIR) puis les applique en base avec des mises à jour
+groupées `vue = F('vue') + n`. Le buffer est aussi vidé à l'arrêt du
+worker (atexit), et `manage.py flush_article_views` force l'écriture en
+base de tout ce qui est en attente dans le dossier.
+"""
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+
+
+logger = logging.getLogger(__name__)
+
+# Un fichier en cours d'écriture en base depuis plus longtemps que ce délai
+# appartient à un processus mort : il est remis en attente
+STALE_CLAIM_SECONDS = 300
+
+_lock = threading.Lock()
+_pending = Counter()
+_pid = None
+
+
+def get_flush_interval():
+    return getattr(settings, 'VIEW_COUNTER_FLUSH_INTERVAL', 10)
+
+
+def get_spool_dir():
+    spool_dir = getattr(settings, 'VIEW_COUNTER_SPOOL_DIR', None)
+    if not spool_dir:
+        spool_dir = os.path.join(tempfile.gettempdir(), 'liftandlight-vues')
+    os.makedirs(spool_dir, exist_ok=True)
+    return str(spool_dir)
+
+
+def record_view(article_id):
+    """Compte une vue pour l'article (écrite en base au prochain flush)"""
+    if not getattr(settings, 'VIEW_COUNTER_BUFFERED', True):
+        apply_counts({article_id: 1})
+        return
+
+    with _lock:
+        _ensure_worker()
+        _pending[article_id] += 1
+
+
+def _ensure_worker():
+    """Démarre le thread de flush dans ce processus (une fois par fork)"""
+    global _pid
+    if _pid == os.getpid():
+        return
+    # Après un fork, le buffer et le thread du parent ne sont pas les nôtres
+    _pid = os.getpid()
+    _pending.clear()
+    thread = threading.Thread(target=_flush_loop, name='view-counter-flush', daemon=True)
+    thread.start()
+
+
+def _flush_loop():
+    while True:
+        time.sleep(get_flush_interval())
+        try:
+            flush()
+        except Exception:
+            # Les compteurs restent dans le dossier et seront réessayés
+            logger.exception('Échec du flush des compteurs de vues')
+        finally:
+            connections.close_all()
+
+
+def spill():
+    """Dépose les compteurs en mémoire de ce processus dans le dossier partagé"""
+    with _lock:
+        if not _pending or _pid != os.getpid():
+            return
+        counts = dict(_pending)
+        _pending.clear()
+
+    spool_dir = get_spool_dir()
+    name = f'{os.getpid()}-{time.time_ns()}.json'
+    tmp_path = os.path.join(spool_dir, name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump({str(k): v for k, v in counts.items()}, f)
+    os.replace(tmp_path, os.path.join(spool_dir, name))
+
+
+def flush():
+    """
+    Dépose les compteurs de ce processus puis écrit en base tous les compteurs
+    en attente dans le dossier partagé. Retourne le nombre de vues écrites.
+    """
+    spill()
+    spool_dir = get_spool_dir()
+    # L'heure de la réclamation est dans le nom du fichier : os.replace()
+    # garde le st_mtime du dépôt, qui peut être ancien
+    suffix = f'.{os.getpid()}-{time.time_ns()}.flushing'
+    now = time.time()
+
+    # Réclamer les fichiers par renommage (atomique) : un fichier déjà
+    # réclamé par un autre worker disparaît et est ignoré
+    claimed = []
+    for name in os.listdir(spool_dir):
+        path = os.path.join(spool_dir, name)
+        if name.endswith('.flushing'):
+            try:
+                if now - claim_time(name) > STALE_CLAIM_SECONDS:
+                    os.replace(path, path.rsplit('.', 2)[0])
+            except OSError:
+                pass
+            continue
+        if not name.endswith('.json'):
+            continue
+        try:
+            os.replace(path, path + suffix)
+        except OSError:
+            continue
+        claimed.append(path + suffix)
+
+    counts = Counter()
+    for path in claimed:
+        try:
+            with open(path) as f:
+                counts.update({int(k): v for k, v in json.load(f).items()})
+        except (OSError, ValueError):
+            continue
+
+    try:
+        apply_counts(counts)
+    except Exception:
+        for path in claimed:
+            try:
+                os.replace(path, path[:-len(suffix)])
+            except OSError:
+                pass
+        raise
+
+    for path in claimed:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Remis en attente par un autre worker (réclamation trop longue)
+            pass
+    return sum(counts.values())
+
+
+def claim_time(name):
+    """Heure (en secondes) d'une réclamation `<fichier>.json.<pid>-<ns>.flushing`"""
+    return int(name.rsplit('.', 2)[1].rsplit('-', 1)[1]) / 1e9
+
+
+def apply_counts(counts):
+    """Écrit les compteurs en base : une mise à jour par valeur d'incrément"""
+    from .models import Article
+
+    by_increment = defaultdict(list)
+    for article_id, count in counts.items():
+        if count:
+            by_increment[count].append(article_id)
+
+    with transaction.atomic():
+        for count, article_ids in by_increment.items():
+            Article.objects.filter(pk__in=article_ids).update(vue=F('vue') + count)
+
+
+@atexit.register
+def _flush_at_exit():
+    if _pid != os.getpid():
+        return
+    try:
+        flush()
+    except Exception:
+        logger.exception('Échec du flush des compteurs de vues à l\'arrêt')
@@ -1,70 +1,148 @@
 from django.shortcuts import render, get_object_or_404
-from django.core.paginator import Paginator
-from .models import Article, CategorieArticle
+from django.db.models import Count, Q, Subquery
+from liftandlight.compression import precompressed_page
+from . import caching
+from .pagination import CursorPaginator
+from .models import Article, ArticleSimilaire, CategorieArticle
 
 
-def liste_articles(request, categorie=None):
-    """Affiche la liste de tous les articles publiés"""
+# Nombre d'articles récents affichés dans la sidebar
+NB_ARTICLES_RECENTS = 5
+
+# Champs utilisés par les listes d'articles mises en cache
+CHAMPS_LISTE = ('titre', 'slug', 'date_publication', 'image_principale', 'image_principale_renditions')
+
+
+def get_sidebar():
+    """
+    Données de la sidebar, en cache jusqu'à la prochaine modification du blog :
+    catégories (avec leur nombre d'articles) et articles récents (un de plus
+    que nécessaire, pour pouvoir exclure l'article affiché).
+    """
+    return caching.get_or_build('sidebar', lambda: {
+        'categories': list(CategorieArticle.objects.annotate(nb_articles=Count('articles'))),
+        'articles_recents': list(
+            Article.objects.filter(publie=True).only(*CHAMPS_LISTE)[:NB_ARTICLES_RECENTS + 1]
+        ),
+    })
+
+
+def get_articles_recents():
+    return get_sidebar()['articles_recents']
+
+
+def get_categorie(categorie):
+    """Catégorie demandée par son slug (404 si inconnue), ou None"""
+    if not categorie:
+        return None
+    return get_object_or_404(CategorieArticle, slug=categorie)
+
+
+def get_page_articles(request, categorie_obj):
+    """Page d'articles publiés demandée, de la catégorie si elle est donnée"""
     articles = Article.objects.filter(publie=True)
-    
-    # Filtrer par catégorie si demandé
-    categorie_obj = None
-    if categorie:
-        categorie_obj = get_object_or_404(CategorieArticle, slug=categorie)
+    if categorie_obj:
         articles = articles.filter(categories=categorie_obj)
-    
-    # Pagination
-    paginator = Paginator(articles, 6)  # 6 articles par page
+
+    # Pagination par curseur (les anciens liens ?page=N restent valides)
+    paginator = CursorPaginator(articles.prefetch_related('categories'), 6)  # 6 articles par page
     page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    # Récupérer toutes les catégories
-    categories = CategorieArticle.objects.all()
-    
-    # Articles récents (pour la sidebar)
-    articles_recents = Article.objects.filter(publie=True)[:5]
-    
-    context = {
+    if page_number is not None:
+        return paginator.get_legacy_page(page_number)
+    return paginator.get_page(request.GET.get('curseur'))
+
+
+def get_liste_context(page_obj, categorie_obj, sidebar):
+    return {
         'articles': page_obj,
-        'categories': categories,
+        'categories': sidebar['categories'],
         'categorie_active': categorie_obj,
-        'articles_recents': articles_recents,
+        'articles_recents': sidebar['articles_recents'][:NB_ARTICLES_RECENTS],
+        'blog_cache_version': caching.get_version(),
     }
-    return render(request, 'blog/liste_articles.html', context)
 
 
-def article_detail(request, slug):
-    """Affiche le détail d'un article"""
-    article = get_object_or_404(Article, slug=slug, publie=True)
-    
-    # Incrémenter le compteur de vues
-    article.increment_vue()
-    
-    # Articles récents (pour la sidebar)
-    articles_recents = Article.objects.filter(publie=True).exclude(id=article.id)[:5]
+@precompressed_page
+def liste_articles(request, categorie=None):
+    """Affiche la liste de tous les articles publiés"""
+    # Filtrer par catégorie si demandé
+    categorie_obj = get_categorie(categorie)
+    page_obj = get_page_articles(request, categorie_obj)
     
-    # Articles similaires (même catégorie)
-    articles_similaires = Article.objects.filter(
-        publie=True,
-        categories__in=article.categories.all()
-    ).exclude(id=article.id).distinct()[:3]
+    # Catégories et articles récents (sidebar, en cache)
+    sidebar = get_sidebar()
     
-    # Navigation précédent/suivant
-    article_precedent = Article.objects.filter(
-        publie=True,
+    context = get_liste_context(page_obj, categorie_obj, sidebar)
+    return render(request, 'blog/liste_articles.html', context)
+
+
+def get_articles_similaires(article):
+    """Articles similaires (3 maximum), lus dans l'index précalculé ArticleSimilaire"""
+    liens = ArticleSimilaire.objects.filter(article=article).select_related('similaire')[:3]
+    return [lien.similaire for lien in liens]
+
+
+def get_precedent_suivant(article):
+    """Articles précédent et suivant, récupérés en une seule requête"""
+    publies = Article.objects.filter(publie=True)
+    precedent = publies.filter(
         date_publication__lt=article.date_publication
-    ).order_by('-date_publication').first()
-    
-    article_suivant = Article.objects.filter(
-        publie=True,
+    ).order_by('-date_publication').values('pk')[:1]
+    suivant = publies.filter(
         date_publication__gt=article.date_publication
-    ).order_by('date_publication').first()
+    ).order_by('date_publication').values('pk')[:1]
+
+    article_precedent = article_suivant = None
+    for voisin in Article.objects.filter(
+        Q(pk=Subquery(precedent)) | Q(pk=Subquery(suivant))
+    ).only('titre', 'slug', 'date_publication'):
+        if voisin.date_publication < article.date_publication:
+            article_precedent = voisin
+        else:
+            article_suivant = voisin
+    return article_precedent, article_suivant
+
+
+def get_article(slug):
+    """Article publié (catégories préchargées), dont la vue est comptée"""
+    article = get_object_or_404(
+        Article.objects.prefetch_related('categories'), slug=slug, publie=True
+    )
     
-    context = {
+    # Incrémenter le compteur de vues
+    article.increment_vue()
+    return article
+
+
+def get_article_context(article, sidebar, articles_similaires, precedent_suivant):
+    article_precedent, article_suivant = precedent_suivant
+    return {
         'article': article,
-        'articles_recents': articles_recents,
+        # Articles récents (pour la sidebar), sans l'article affiché
+        'articles_recents': [a for a in sidebar['articles_recents'] if a.id != article.id][:NB_ARTICLES_RECENTS],
         'articles_similaires': articles_similaires,
         'article_precedent': article_precedent,
         'article_suivant': article_suivant,
+        'blog_cache_version': caching.get_version(),
     }
+
+
+@precompressed_page
+def article_detail(request, slug):
+    """
+    Affiche le détail d'un article.
+    Budget : l'article, ses catégories (prefetch), les similaires (index
+    ArticleSimilaire) et précédent/suivant, soit 4 requêtes ; les articles
+    récents viennent du cache.
+    """
+    article = get_article(slug)
+    
+    context = get_article_context(
+        article,
+        get_sidebar(),
+        # Articles similaires (même catégorie)
+        get_articles_similaires(article),
+        # Navigation précédent/suivant
+        get_precedent_suivant(article),
+    )
     return render(request, 'blog/article_detail.html', context)
@@ -5,11 +5,20 @@ set -e
 echo "Installing dependencies..."
 python -m pip install -r requirements.txt
 
+echo "Optimizing images..."
+python manage.py optimize_images --webp --avif || python manage.py optimize_images --webp || true
+
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
+echo "Prerendering static pages..."
+python manage.py prerender_pages || true
+
 echo "Running migrations..."
 python manage.py migrate --noinput || true
 
+echo "Rebuilding related articles index..."
+python manage.py rebuild_related_articles || true
+
 echo "Build complete!"
 
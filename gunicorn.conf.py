@@ -0,0 +1,165 @@
+"""
+Configuration de gunicorn, commune à start.sh, Procfile et render.yaml :
+
+    python -m gunicorn -c gunicorn.conf.py
+
+- SERVER_MODE=wsgi (défaut) ou asgi (workers uvicorn, vues async).
+- Nombre de workers calculé depuis les cœurs et la mémoire disponibles
+  (limites du conteneur comprises) ; WEB_CONCURRENCY et GUNICORN_THREADS
+  permettent de l'imposer.
+- preload_app : Django est importé et préchauffé une seule fois dans le
+  processus maître, puis partagé par les workers (copy-on-write).
+- Les workers sont recyclés après GUNICORN_MAX_REQUESTS requêtes, avec une
+  part aléatoire pour qu'ils ne redémarrent pas tous en même temps.
+- Les métriques Prometheus (/metrics) de tous les workers sont écrites dans
+  PROMETHEUS_MULTIPROC_DIR, vidé au démarrage.
+"""
+import math
+import os
+import shutil
+import tempfile
+
+# Mémoire estimée d'un worker Django (Pillow compris) et mémoire réservée
+# au processus maître et au système, en Mo
+WORKER_MEMORY_MB = int(os.environ.get('GUNICORN_WORKER_MEMORY_MB', 160))
+RESERVED_MEMORY_MB = int(os.environ.get('GUNICORN_RESERVED_MEMORY_MB', 128))
+
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi').lower()
+
+
+def cpu_count():
+    """Cœurs utilisables, quota CPU du conteneur (cgroup) compris"""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cores = min(cores, max(math.ceil(int(quota) / int(period)), 1))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+
+def memory_mb():
+    """Mémoire disponible en Mo : limite du conteneur, sinon mémoire physique"""
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        # Pas de limite : "max" (cgroup v2) ou une valeur énorme (v1)
+        if value.isdigit() and int(value) < 1 << 50:
+            return int(value) // (1024 * 1024)
+    try:
+        return os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def get_concurrency():
+    """
+    (workers, threads) : 2 x cœurs + 1 workers, dans la limite de la mémoire.
+    Si la mémoire limite les workers, des threads compensent (mode wsgi).
+    """
+    target = 2 * cpu_count() + 1
+    workers = target
+    memory = memory_mb()
+    if memory:
+        workers = min(workers, max((memory - RESERVED_MEMORY_MB) // WORKER_MEMORY_MB, 1))
+    workers = int(os.environ.get('WEB_CONCURRENCY', workers))
+
+    threads = min(math.ceil(target / workers), 4)
+    if SERVER_MODE == 'asgi':
+        threads = 1
+    threads = int(os.environ.get('GUNICORN_THREADS', threads))
+    return max(workers, 1), max(threads, 1)
+
+
+workers, threads = get_concurrency()
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'liftandlight.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'liftandlight.wsgi:application'
+    worker_class = 'gthread' if threads > 1 else 'sync'
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True').lower() == 'true'
+
+# Recyclage des workers (fuites mémoire) : entre max_requests et
+# max_requests + max_requests_jitter requêtes
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+# Fichier de vie des workers en mémoire : pas de blocage sur un disque lent
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = '-'
+errorlog = '-'
+
+# Dossier partagé des métriques : défini avant que Django (et donc
+# prometheus_client) ne soit importé, dans le maître comme dans les workers.
+# Il est vidé au premier chargement de cette configuration (avant le
+# préchargement de l'application), pas lorsqu'elle est relue (SIGHUP) :
+# les workers en cours écrivent encore dans leurs fichiers.
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'liftandlight-metrics'),
+)
+if os.environ.get('LIFTANDLIGHT_METRICS_MASTER') != str(os.getpid()):
+    os.environ['LIFTANDLIGHT_METRICS_MASTER'] = str(os.getpid())
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def when_ready(server):
+    """
+    Processus maître, avant le lancement des workers. Avec preload_app, les
+    caches sont préchauffés ici une seule fois et hérités par les workers.
+    """
+    server.log.info(
+        'Mode %s : %d workers x %d threads (%s), preload=%s, max_requests=%d+%d',
+        SERVER_MODE, workers, threads, worker_class, preload_app, max_requests, max_requests_jitter,
+    )
+    if preload_app:
+        from liftandlight.warmup import warm_caches
+        warm_caches()
+        # Une connexion ouverte ici ne doit pas être partagée par les workers
+        from django.db import connections
+        connections.close_all()
+        # Mémoire du maître, qui garde l'application préchargée
+        from liftandlight import metrics
+        if metrics.is_enabled():
+            metrics.update_memory(force=True)
+
+
+def post_worker_init(worker):
+    """Worker prêt, avant sa première requête"""
+    from liftandlight.warmup import warm_caches, warm_connection
+    if not preload_app:
+        warm_caches()
+    # Les connexions sont propres à chaque thread : seul le worker sync
+    # traite ses requêtes dans le thread où la connexion est ouverte ici
+    if worker_class == 'sync':
+        warm_connection()
+    # Mémoire du worker publiée dès son démarrage (puis relue par les requêtes)
+    from liftandlight import metrics
+    if metrics.is_enabled():
+        metrics.update_memory(force=True)
+
+
+def child_exit(server, worker):
+    """Worker arrêté (recyclage, erreur) : ses compteurs restent dans les totaux"""
+    from liftandlight import metrics
+    metrics.mark_process_dead(worker.pid)
@@ -12,6 +12,16 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'liftandlight.settings')
+# Servi par uvicorn (SERVER_MODE=asgi) : versions async des vues (ASYNC_VIEWS)
+os.environ.setdefault('SERVER_MODE', 'asgi')
+os.environ.setdefault('DJANGO_ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
 
+# Templates compilés et URL résolues avant la première requête (WARMUP_ON_START)
+from django.conf import settings  # noqa: E402
+
+if getattr(settings, 'WARMUP_ON_START', False):
+    from liftandlight.warmup import warm_up
+    warm_up()
+
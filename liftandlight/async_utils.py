@@ -0,0 +1,39 @@
+"""
+Outils pour les vues asynchrones (mode ASGI, voir asgi.py)
+
+L'ORM de Django 4.2 est synchrone : dans une vue async, les accès à la base
+et le rendu des templates (qui peuvent évaluer des QuerySet) passent par un
+thread, pendant que la boucle d'événements continue de servir les autres
+connexions.
+
+- run_sync(func, ...) exécute func dans le thread de la requête (même
+  connexion, mêmes transactions que le reste de la requête).
+- run_parallel((func, ...), ...) exécute des fonctions indépendantes en même
+  temps, chacune dans un thread du pool avec sa propre connexion, fermée
+  à la fin de l'appel (CONN_MAX_AGE vaut 0 en mode ASGI, voir
+  settings_prod).
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def run_sync(func, *args, **kwargs):
+    return sync_to_async(func)(*args, **kwargs)
+
+
+def _with_own_connection(func, args):
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+async def run_parallel(*calls):
+    """Exécute les appels (func, *args) en même temps ; résultats dans l'ordre"""
+    return await asyncio.gather(*(
+        sync_to_async(_with_own_connection, thread_sensitive=False)(func, args)
+        for func, *args in calls
+    ))
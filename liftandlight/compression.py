@@ -0,0 +1,198 @@
+"""
+Compression des pages HTML générées par Django (gzip et brotli)
+
+Seul l'encodage choisi selon l'en-tête Accept-Encoding est calculé, au
+moment de répondre, avec des niveaux rapides (BROTLI_QUALITY, GZIP_LEVEL) :
+quelques millisecondes par page. Les pages servies depuis un cache gardent
+aussi leurs versions compressées (use_compression_cache, LRU par processus ;
+static_pages a son propre cache). Les fichiers prérendus (manage.py
+prerender_pages) sont compressés une fois pour toutes au niveau maximal
+(compress_variants).
+
+Usage :
+    @precompressed_page
+    def ma_vue(request): ...
+
+Le décorateur accepte aussi les vues async (mode ASGI) : la compression est
+alors faite dans un thread, sans bloquer la boucle d'événements.
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import partial, wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import decorator_from_middleware
+from django.utils.deprecation import MiddlewareMixin
+
+from . import timing
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+
+# En-dessous de cette taille, la compression ne vaut pas la peine
+MIN_LENGTH = 200
+
+# Encodages proposés, par ordre de préférence
+ENCODINGS = ('br', 'gzip') if BROTLI_AVAILABLE else ('gzip',)
+
+# Niveaux de compression à la volée : brotli 11 coûte plusieurs dizaines de
+# millisecondes par page, pour à peine 10 % de moins que brotli 5
+BROTLI_QUALITY = 5
+GZIP_LEVEL = 6
+
+_variants = OrderedDict()
+_variants_lock = threading.Lock()
+
+
+def compress(body, encoding, quality=None):
+    """Compresse un contenu en bytes ; quality par défaut : niveau à la volée"""
+    if encoding == 'br':
+        return brotli.compress(body, mode=brotli.MODE_TEXT, quality=quality or BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=quality or GZIP_LEVEL, mtime=0)
+
+
+def compress_variants(body):
+    """Retourne {encodage: contenu compressé au niveau maximal} (fichiers prérendus)"""
+    variants = {'gzip': compress(body, 'gzip', quality=9)}
+    if BROTLI_AVAILABLE:
+        variants['br'] = compress(body, 'br', quality=11)
+    return variants
+
+
+def get_compressed(body, encoding):
+    """
+    Contenu compressé dans un encodage, depuis le cache si déjà calculé.
+    Réservé aux pages elles-mêmes servies depuis un cache (voir
+    use_compression_cache) : une page rendue à chaque requête change
+    souvent (compteur de vues...) et ne ferait qu'évincer les autres.
+    """
+    key = (hashlib.md5(body, usedforsecurity=False).digest(), encoding)
+    with _variants_lock:
+        compressed = _variants.get(key)
+        if compressed is not None:
+            _variants.move_to_end(key)
+            return compressed
+
+    with timing.measure('compress'):
+        compressed = compress(body, encoding)
+    with _variants_lock:
+        _variants[key] = compressed
+        while len(_variants) > getattr(settings, 'HTML_COMPRESSION_CACHE_SIZE', 128):
+            _variants.popitem(last=False)
+    return compressed
+
+
+def use_compression_cache(response):
+    """Page rendue depuis un cache : ses versions compressées sont gardées aussi"""
+    response.compressor = partial(get_compressed, response.content)
+    return response
+
+
+def parse_accept_encoding(header):
+    """Retourne {encodage: qualité} depuis un en-tête Accept-Encoding"""
+    accepted = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def negotiate_encoding(header, available=ENCODINGS):
+    """Choisit le meilleur encodage accepté par le client, ou None"""
+    accepted = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class PrecompressedHTMLMiddleware(MiddlewareMixin):
+    """
+    Renvoie les réponses HTML compressées en gzip ou brotli, à partir des
+    variantes mises en cache. Une vue peut fournir son propre cache via
+    l'attribut `response.compressor` : fonction(encodage) qui retourne le
+    contenu compressé, ou None.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if response.status_code == 304:
+            # Mêmes Vary et validateur que la réponse 200 qu'elle confirme
+            self.patch_headers(response)
+            return response
+        if response.status_code != 200:
+            return response
+        if not response.get('Content-Type', '').startswith('text/html'):
+            return response
+
+        self.patch_headers(response)
+        if len(response.content) < MIN_LENGTH:
+            return response
+
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        compressor = getattr(response, 'compressor', None)
+        compressed = compressor(encoding) if compressor else None
+        if compressed is None:
+            with timing.measure('compress'):
+                compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def patch_headers(self, response):
+        """
+        Vary: Accept-Encoding et ETag faible (RFC 9110 8.8.1), que la page
+        soit compressée ou non : les variantes d'une même page partagent un
+        validateur, identique sur les réponses 200 et 304, et les requêtes
+        conditionnelles (comparaison faible) continuent de correspondre.
+        """
+        patch_vary_headers(response, ('Accept-Encoding',))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+
+
+_precompressed_sync = decorator_from_middleware(PrecompressedHTMLMiddleware)
+
+
+def precompressed_page(view_func):
+    if not iscoroutinefunction(view_func):
+        return _precompressed_sync(view_func)
+
+    middleware = PrecompressedHTMLMiddleware(view_func)
+    process_response = sync_to_async(middleware.process_response, thread_sensitive=False)
+
+    @wraps(view_func)
+    async def _view(request, *args, **kwargs):
+        response = await view_func(request, *args, **kwargs)
+        return await process_response(request, response)
+
+    return _view
@@ -0,0 +1,94 @@
+"""
+Redimensionnement et encodage des images avec Pillow
+
+Utilisé par la commande optimize_images et par les déclinaisons
+responsive des images envoyées (liftandlight.renditions).
+"""
+try:
+    from PIL import Image, ImageOps, features
+    PIL_AVAILABLE = True
+    # AVIF : seulement si Pillow est compilé avec libavif
+    AVIF_AVAILABLE = features.check('avif')
+    # Image illisible : fichier corrompu, ou trop grande (bombe de décompression)
+    IMAGE_ERRORS = (OSError, Image.DecompressionBombError)
+except ImportError:
+    PIL_AVAILABLE = False
+    AVIF_AVAILABLE = False
+    IMAGE_ERRORS = (OSError,)
+
+
+# Tailles des versions responsive (plus grande dimension, en pixels)
+RESPONSIVE_SIZES = {
+    'small': 480,
+    'medium': 768,
+    'large': 1200,
+}
+
+# Options d'encodage par format Pillow
+SAVE_OPTIONS = {
+    'JPEG': {'optimize': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'method': 6},
+    'AVIF': {'speed': 8},
+}
+
+
+def open_image(fp):
+    """Ouvre une image en appliquant l'orientation EXIF (photos de téléphone)"""
+    img = Image.open(fp)
+    img.load()
+    return ImageOps.exif_transpose(img)
+
+
+def flatten(img, background=(255, 255, 255)):
+    """Convertit en RGB, la transparence éventuelle sur un fond blanc"""
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        rgb_img = Image.new('RGB', img.size, background)
+        rgb_img.paste(img, mask=img.split()[-1])
+        return rgb_img
+    if img.mode != 'RGB':
+        return img.convert('RGB')
+    return img
+
+
+def resize_max(img, max_size):
+    """Réduit l'image pour que sa plus grande dimension soit max_size"""
+    ratio = min(max_size / max(img.size), 1.0)
+    new_size = (int(img.size[0] * ratio), int(img.size[1] * ratio))
+    return img.resize(new_size, Image.Resampling.LANCZOS)
+
+
+def resize_width(img, width):
+    """Réduit l'image à la largeur donnée, en gardant les proportions"""
+    if img.width <= width:
+        return img
+    height = max(round(img.height * width / img.width), 1)
+    return img.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def resize_box(img, width, height):
+    """
+    Redimensionne à width x height en recadrant au centre ; une dimension à 0
+    est calculée pour garder les proportions. L'image n'est jamais agrandie.
+    """
+    if width and height:
+        scale = min(img.width / width, img.height / height, 1.0)
+        size = (max(round(width * scale), 1), max(round(height * scale), 1))
+        return ImageOps.fit(img, size, Image.Resampling.LANCZOS)
+    if width:
+        return resize_width(img, width)
+    if height and img.height > height:
+        return img.resize((max(round(img.width * height / img.height), 1), height), Image.Resampling.LANCZOS)
+    return img
+
+
+def save_image(img, target, format, quality=85, **options):
+    """
+    Encode l'image dans target (chemin ou fichier ouvert) au format Pillow
+    donné ('JPEG', 'PNG', 'WEBP'), avec les options par défaut de SAVE_OPTIONS.
+    """
+    params = dict(SAVE_OPTIONS.get(format, {}), **options)
+    if format != 'PNG':
+        params['quality'] = quality
+    img.save(target, format, **params)
@@ -0,0 +1,204 @@
+"""
+Métriques Prometheus du site, exposées sur /metrics
+
+MetricsMiddleware compte chaque requête, étiquetée par le nom de l'URL résolue
+(`projets:accueil`, `blog:article_detail`...) plutôt que par son chemin, pour
+garder un nombre de séries borné :
+
+- liftandlight_http_request_duration_seconds : histogramme des durées, par
+  vue et méthode ;
+- liftandlight_http_responses_total : réponses par vue et code HTTP ;
+- liftandlight_db_queries_total et liftandlight_db_queries_per_request :
+  requêtes SQL par vue (relevé de liftandlight.timing) ;
+- liftandlight_process_resident_memory_bytes : mémoire de chaque processus,
+  relue au plus toutes les MEMORY_INTERVAL secondes.
+
+Sous gunicorn, chaque worker a ses propres compteurs : prometheus_client les
+écrit dans des fichiers de PROMETHEUS_MULTIPROC_DIR (défini par
+gunicorn.conf.py, avant tout import), et la vue les additionne, quel que soit
+le worker qui répond. Les compteurs des workers recyclés sont gardés, la
+mémoire n'est donnée que pour les processus vivants (hook child_exit).
+
+Accès : adresses de METRICS_ALLOWED_IPS (REMOTE_ADDR, l'en-tête
+X-Forwarded-For n'est pas pris en compte), ou en-tête
+`Authorization: Bearer <METRICS_TOKEN>` derrière un proxy.
+"""
+import hmac
+import ipaddress
+import os
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed, PermissionDenied
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import require_GET
+
+from . import timing
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+        generate_latest, multiprocess,
+    )
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+
+# Relecture de la mémoire du processus, en secondes
+MEMORY_INTERVAL = 15
+
+# Vue des requêtes non résolues (404 hors des URL du site)
+UNRESOLVED = 'none'
+
+if PROMETHEUS_AVAILABLE:
+    REQUEST_DURATION = Histogram(
+        'liftandlight_http_request_duration_seconds',
+        'Durée des requêtes HTTP',
+        ['view', 'method'],
+    )
+    RESPONSES = Counter(
+        'liftandlight_http_responses',
+        'Réponses HTTP par code',
+        ['view', 'status'],
+    )
+    DB_QUERIES = Counter(
+        'liftandlight_db_queries',
+        'Requêtes SQL exécutées',
+        ['view'],
+    )
+    DB_QUERIES_PER_REQUEST = Histogram(
+        'liftandlight_db_queries_per_request',
+        'Requêtes SQL par requête HTTP',
+        ['view'],
+        buckets=(0, 1, 2, 5, 10, 20, 50, 100, float('inf')),
+    )
+    MEMORY = Gauge(
+        'liftandlight_process_resident_memory_bytes',
+        'Mémoire résidente du processus',
+        multiprocess_mode='liveall',
+    )
+
+_memory_updated = 0.0
+
+
+def resident_memory():
+    """Mémoire résidente du processus courant en octets, ou None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # ru_maxrss : pic de mémoire, en Ko sous Linux (faute de mieux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def update_memory(force=False):
+    global _memory_updated
+    now = time.monotonic()
+    if not force and now - _memory_updated < MEMORY_INTERVAL:
+        return
+    _memory_updated = now
+    memory = resident_memory()
+    if memory is not None:
+        MEMORY.set(memory)
+
+
+def is_enabled():
+    return PROMETHEUS_AVAILABLE and getattr(settings, 'METRICS_ENABLED', True)
+
+
+def record(request, response, duration):
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match else UNRESOLVED
+    REQUEST_DURATION.labels(view, request.method).observe(duration)
+    RESPONSES.labels(view, str(response.status_code)).inc()
+    timings = timing.current()
+    if timings is not None:
+        DB_QUERIES.labels(view).inc(timings.db_queries)
+        DB_QUERIES_PER_REQUEST.labels(view).observe(timings.db_queries)
+    update_memory()
+
+
+class MetricsMiddleware:
+    """
+    À placer après ServerTimingMiddleware, dont il lit le nombre de
+    requêtes SQL
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not is_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        record(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        record(request, response, time.perf_counter() - start)
+        return response
+
+
+def is_allowed(request):
+    """Jeton (Authorization: Bearer) ou adresse autorisée"""
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        scheme, _, value = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() == 'bearer' and hmac.compare_digest(value.strip().encode(), token.encode()):
+            return True
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    for allowed in getattr(settings, 'METRICS_ALLOWED_IPS', ()):
+        try:
+            if address in ipaddress.ip_network(allowed, strict=False):
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+def get_registry():
+    """Registre agrégeant tous les processus (gunicorn), sinon celui du processus"""
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+@require_GET
+def metrics_view(request):
+    """Métriques au format texte de Prometheus"""
+    if not is_enabled():
+        raise Http404('Métriques désactivées')
+    if not is_allowed(request):
+        raise PermissionDenied('Accès aux métriques refusé')
+    update_memory(force=True)
+    response = HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def mark_process_dead(pid):
+    """Hook child_exit de gunicorn : retire la mémoire d'un worker arrêté"""
+    if PROMETHEUS_AVAILABLE and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,123 @@
+"""
+Envoi de fichiers volumineux (vidéos) avec prise en charge des plages
+
+ranged_file_response() répond aux requêtes Range (206 Partial Content,
+416 si la plage est hors du fichier) et If-Range, ainsi qu'aux requêtes
+conditionnelles (ETag / Last-Modified, 304). Le fichier est transmis par
+FileResponse : avec gunicorn, le corps est envoyé par sendfile (sans copie
+dans le worker), y compris pour une plage, limitée par Content-Length.
+"""
+import mimetypes
+import os
+import re
+
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def parse_range(header, size):
+    """
+    Retourne (début, fin incluse) de la plage demandée, ou None si l'en-tête
+    doit être ignoré (invalide, ou plusieurs plages : le fichier entier est
+    alors envoyé). Lève RangeNotSatisfiable si la plage est hors du fichier.
+    """
+    match = _RANGE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        # bytes=-N : les N derniers octets
+        suffix = int(end)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable(header)
+        return max(size - suffix, 0), size - 1
+    start = int(start)
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    end = min(int(end), size - 1) if end else size - 1
+    if end < start:
+        return None
+    return start, end
+
+
+class RangeFile:
+    """
+    Fichier limité à une plage. Garde fileno() : le serveur peut utiliser
+    sendfile à partir de la position courante, pour Content-Length octets.
+    """
+
+    def __init__(self, f, start, length):
+        f.seek(start)
+        self._file = f
+        self._remaining = length
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b''
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def close(self):
+        self._file.close()
+
+
+def _if_range_matches(request, etag, mtime):
+    """If-Range absent ou toujours valide : la plage peut être envoyée"""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        # Comparaison forte : un ETag faible (W/) ne correspond jamais
+        return if_range == etag
+    return parse_http_date_safe(if_range) == mtime
+
+
+def ranged_file_response(request, path, content_type=None, max_age=0):
+    """Réponse pour le fichier `path`, entière ou partielle selon Range"""
+    stat = os.stat(path)
+    size = stat.st_size
+    mtime = int(stat.st_mtime)
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+
+    response = get_conditional_response(request, etag=etag, last_modified=mtime)
+    if response is None:
+        content_type = content_type or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        byte_range = None
+        range_header = request.META.get('HTTP_RANGE')
+        if range_header and _if_range_matches(request, etag, mtime):
+            try:
+                byte_range = parse_range(range_header, size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+
+        f = open(path, 'rb')
+        if byte_range is None:
+            response = FileResponse(f, content_type=content_type)
+        else:
+            start, end = byte_range
+            response = FileResponse(RangeFile(f, start, end - start + 1), status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = end - start + 1
+
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(mtime)
+    if max_age:
+        response['Cache-Control'] = f'public, max-age={max_age}'
+    return response
@@ -0,0 +1,139 @@
+"""
+Déclinaisons responsive des images envoyées (largeurs fixes, WebP et JPEG)
+
+À l'envoi d'une image, des copies réduites sont générées dans
+MEDIA_ROOT/renditions/ et décrites dans le champ JSON `<champ>_renditions`
+du modèle :
+
+    {
+        "source": "projets/photo.jpg",
+        "width": 3000, "height": 2000,
+        "renditions": [
+            {"width": 480, "webp": "renditions/projets/photo-480w.webp",
+             "jpeg": "renditions/projets/photo-480w.jpg"},
+            ...
+        ]
+    }
+
+Les signaux de projets et blog appellent update_field() après chaque
+enregistrement ; `manage.py generate_renditions` traite les images
+existantes. Le tag {% responsive_image %} (templatetags/renditions.py) s'en
+sert pour produire un <picture> avec srcset.
+"""
+import io
+import logging
+import posixpath
+
+from django.core.files.base import ContentFile
+
+from .images import PIL_AVAILABLE, flatten, open_image, resize_width, save_image
+
+
+logger = logging.getLogger(__name__)
+
+# Largeurs générées (une image plus étroite n'est jamais agrandie)
+WIDTHS = (480, 768, 1200)
+
+# Extension de fichier et format Pillow de chaque déclinaison
+FORMATS = {
+    'webp': ('webp', 'WEBP'),
+    'jpeg': ('jpg', 'JPEG'),
+}
+
+QUALITY = 82
+
+RENDITIONS_DIR = 'renditions'
+
+# Champs image avec déclinaisons : (application, modèle, champ)
+RENDITION_FIELDS = (
+    ('projets', 'Projet', 'image_principale'),
+    ('projets', 'ImageProjet', 'image'),
+    ('blog', 'Article', 'image_principale'),
+)
+
+
+def renditions_field(field_name):
+    """Nom du champ JSON qui décrit les déclinaisons d'un champ image"""
+    return f'{field_name}_renditions'
+
+
+def target_widths(width):
+    """Largeurs à générer pour une image de cette largeur"""
+    widths = [w for w in WIDTHS if w < width]
+    if len(widths) < len(WIDTHS):
+        # Image plus étroite que la plus grande largeur : gardée à sa taille
+        widths.append(width)
+    return widths
+
+
+def rendition_name(source_name, width, extension):
+    stem = posixpath.splitext(source_name)[0]
+    return f'{RENDITIONS_DIR}/{stem}-{width}w.{extension}'
+
+
+def generate(field_file):
+    """
+    Génère les déclinaisons d'une image (FieldFile) dans son stockage et
+    retourne leur description (sans déclinaisons si l'image est illisible).
+    """
+    if not PIL_AVAILABLE or not field_file:
+        return {}
+
+    storage = field_file.storage
+    try:
+        with field_file.open('rb'):
+            img = flatten(open_image(field_file))
+    except (OSError, ValueError):
+        logger.exception('Image illisible, pas de déclinaisons : %s', field_file.name)
+        return {'source': field_file.name, 'renditions': []}
+
+    renditions = []
+    for width in target_widths(img.width):
+        resized = resize_width(img, width)
+        rendition = {'width': width}
+        for key, (extension, format) in FORMATS.items():
+            buffer = io.BytesIO()
+            save_image(resized, buffer, format, QUALITY)
+            name = rendition_name(field_file.name, width, extension)
+            # Même source, même nom : une ancienne version est remplacée
+            storage.delete(name)
+            rendition[key] = storage.save(name, ContentFile(buffer.getvalue()))
+        renditions.append(rendition)
+
+    return {
+        'source': field_file.name,
+        'width': img.width,
+        'height': img.height,
+        'renditions': renditions,
+    }
+
+
+def delete(data, storage):
+    """Supprime les fichiers des déclinaisons décrites par data"""
+    for rendition in (data or {}).get('renditions', []):
+        for key in FORMATS:
+            if rendition.get(key):
+                storage.delete(rendition[key])
+
+
+def update_field(instance, field_name, force=False):
+    """
+    Met à jour les déclinaisons d'un champ image si l'image a changé depuis
+    la dernière génération (ou toujours avec force). Les anciennes
+    déclinaisons sont supprimées. Retourne True si le champ a été mis à jour.
+    """
+    json_field = renditions_field(field_name)
+    field_file = getattr(instance, field_name)
+    current = getattr(instance, json_field) or {}
+    source = field_file.name if field_file else None
+    if not force and current.get('source') == source:
+        return False
+
+    data = generate(field_file) if source else {}
+    if current.get('source') != source:
+        delete(current, field_file.storage)
+
+    # update() : pas de nouveau signal post_save
+    type(instance)._default_manager.filter(pk=instance.pk).update(**{json_field: data})
+    setattr(instance, json_field, data)
+    return True
@@ -0,0 +1,225 @@
+"""
+Images redimensionnées à la demande : /media/r/<largeur>x<hauteur>/<chemin>?s=<signature>
+
+Pour les tailles qui ne font pas partie des déclinaisons générées à l'envoi
+(liftandlight.renditions) : miniatures de l'admin, images des réseaux
+sociaux... Le chemin désigne un fichier de MEDIA_ROOT, ou un fichier
+statique s'il commence par `static/`. Avec les deux dimensions, l'image est
+recadrée au centre ; une dimension à 0 garde les proportions.
+
+- Les URL sont signées (resized_url() ou le tag {% resized_image_url %}) :
+  sans signature valide, la réponse est 403 et rien n'est encodé.
+- Les images produites sont gardées dans RESIZED_IMAGES_CACHE_DIR, dont la
+  taille est bornée par RESIZED_IMAGES_CACHE_MAX_BYTES (les images les
+  moins récemment servies sont supprimées en premier).
+- Un verrou de fichier (fcntl) fait qu'un seul processus encode une image
+  donnée ; les requêtes simultanées attendent puis servent le résultat.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
+from django.core.signing import Signer
+from django.http import FileResponse, Http404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.utils._os import safe_join
+
+from .images import IMAGE_ERRORS, PIL_AVAILABLE, flatten, open_image, resize_box, save_image
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+STATIC_PREFIX = 'static/'
+
+# Format de sortie selon l'extension de l'image source
+OUTPUT_FORMATS = {
+    '.jpg': ('JPEG', 'image/jpeg'),
+    '.jpeg': ('JPEG', 'image/jpeg'),
+    '.png': ('PNG', 'image/png'),
+    '.webp': ('WEBP', 'image/webp'),
+}
+
+QUALITY = 82
+
+_signer = Signer(salt='liftandlight.resized_images')
+
+
+def get_cache_dir():
+    cache_dir = getattr(settings, 'RESIZED_IMAGES_CACHE_DIR', None)
+    if not cache_dir:
+        cache_dir = os.path.join(tempfile.gettempdir(), 'liftandlight-resized')
+    os.makedirs(cache_dir, exist_ok=True)
+    return str(cache_dir)
+
+
+def get_max_bytes():
+    return getattr(settings, 'RESIZED_IMAGES_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+
+
+def get_max_size():
+    return getattr(settings, 'RESIZED_IMAGES_MAX_SIZE', 2400)
+
+
+def sign(width, height, path):
+    return _signer.signature(f'{width}x{height}/{path}')
+
+
+def resized_url(path, width=0, height=0):
+    """URL signée de l'image `path` redimensionnée à width x height"""
+    path = str(path).lstrip('/')
+    url = reverse('resized_image', kwargs={'width': width, 'height': height, 'path': path})
+    return f'{url}?s={sign(width, height, path)}'
+
+
+def find_source(path):
+    """Chemin absolu du fichier source, ou None"""
+    try:
+        if path.startswith(STATIC_PREFIX):
+            static_path = path[len(STATIC_PREFIX):]
+            found = finders.find(static_path)
+            if found:
+                return found
+            candidate = safe_join(settings.STATIC_ROOT, static_path)
+        else:
+            candidate = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        # Chemin hors du dossier (../)
+        return None
+    return candidate if os.path.isfile(candidate) else None
+
+
+def get_cache_name(width, height, source, extension):
+    """Nom de l'image produite : change quand la source est modifiée"""
+    stat = os.stat(source)
+    raw = f'{width}x{height}|{source}|{stat.st_mtime_ns}|{stat.st_size}'
+    return hashlib.sha1(raw.encode()).hexdigest() + extension
+
+
+def _lock(cache_dir, name):
+    """Verrou exclusif partagé entre processus (un fichier par préfixe de nom)"""
+    if fcntl is None:
+        return None
+    lock_dir = os.path.join(cache_dir, 'locks')
+    os.makedirs(lock_dir, exist_ok=True)
+    lock_file = open(os.path.join(lock_dir, name[:2] + '.lock'), 'w')
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+    return lock_file
+
+
+def _unlock(lock_file):
+    if lock_file is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+
+def encode(source, target, width, height, format):
+    with open_image(source) as img:
+        resized = resize_box(img, width, height)
+    if format == 'JPEG':
+        resized = flatten(resized)
+    # WebP : compression plus rapide que pour les déclinaisons (method=6)
+    options = {'method': 4} if format == 'WEBP' else {}
+    tmp_path = f'{target}.{os.getpid()}.tmp'
+    try:
+        save_image(resized, tmp_path, format, QUALITY, **options)
+        os.replace(tmp_path, target)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def evict(cache_dir, max_bytes):
+    """Supprime les images les moins récemment servies au-delà de max_bytes"""
+    entries = []
+    total = 0
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if not entry.is_file() or entry.name.endswith('.tmp'):
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, entry.path, stat.st_size))
+            total += stat.st_size
+    entries.sort()
+    for _, path, size in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
+def get_resized(source, name, width, height, format):
+    """
+    Image redimensionnée `name`, ouverte en lecture : encodée si elle n'est
+    pas en cache. Le fichier ouvert reste lisible même s'il est évincé ensuite.
+    """
+    cache_dir = get_cache_dir()
+    target = os.path.join(cache_dir, name)
+
+    try:
+        f = open(target, 'rb')
+    except FileNotFoundError:
+        pass
+    else:
+        # Marque l'image comme récemment servie (éviction LRU)
+        os.utime(f.fileno())
+        return f
+
+    lock_file = _lock(cache_dir, name)
+    try:
+        # Encodée entre-temps par une autre requête ?
+        if not os.path.exists(target):
+            encode(source, target, width, height, format)
+        f = open(target, 'rb')
+    finally:
+        _unlock(lock_file)
+    evict(cache_dir, get_max_bytes())
+    return f
+
+
+def serve(request, width, height, path):
+    """Sert une image redimensionnée (URL signée, voir resized_url)"""
+    if not constant_time_compare(request.GET.get('s', ''), sign(width, height, path)):
+        raise PermissionDenied('Signature invalide')
+    max_size = get_max_size()
+    if width > max_size or height > max_size or not (width or height):
+        raise Http404('Taille non disponible')
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in OUTPUT_FORMATS or not PIL_AVAILABLE:
+        raise Http404('Format non pris en charge')
+    source = find_source(path)
+    if source is None:
+        raise Http404('Image introuvable')
+
+    format, content_type = OUTPUT_FORMATS[extension]
+    name = get_cache_name(width, height, source, extension)
+    etag = f'"{name}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        return response
+
+    try:
+        f = get_resized(source, name, width, height, format)
+    except IMAGE_ERRORS:
+        logger.exception('Redimensionnement impossible : %s', path)
+        raise Http404('Image illisible')
+
+    response = FileResponse(f, content_type=content_type)
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, max-age=86400'
+    return response
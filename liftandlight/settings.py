@@ -4,6 +4,8 @@ Django settings for liftandlight project.
 
 from pathlib import Path
 import os
+import sys
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -36,6 +38,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Server-Timing et log structuré par requête (liftandlight/timing.py)
+    'liftandlight.timing.ServerTimingMiddleware',
+    # Métriques Prometheus (liftandlight/metrics.py), exposées sur /metrics
+    'liftandlight.metrics.MetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -48,7 +54,8 @@ ROOT_URLCONF = 'liftandlight.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Backend Django standard, avec mesure du temps de rendu (Server-Timing)
+        'BACKEND': 'liftandlight.timing.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -76,6 +83,41 @@ DATABASES = {
 }
 
 
+# Cache
+# Partagé entre les workers d'une même machine : les caches invalidés par
+# signaux (blog, projets) doivent être vus par tous les processus.
+# Les pages y restent sans expiration : le préfixe des clés change à chaque
+# déploiement (commit fourni par l'hébergeur, ou CACHE_KEY_PREFIX), pour ne
+# pas resservir des pages rendues par l'ancien code ou une autre base
+
+CACHE_KEY_PREFIX = (
+    os.environ.get('CACHE_KEY_PREFIX')
+    or os.environ.get('RENDER_GIT_COMMIT')  # Render
+    or os.environ.get('HEROKU_SLUG_COMMIT')  # Heroku (dyno metadata)
+    or os.environ.get('VERCEL_GIT_COMMIT_SHA')  # Vercel
+    or ''
+)[:12]
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'liftandlight-cache')),
+        'KEY_PREFIX': CACHE_KEY_PREFIX,
+        'OPTIONS': {
+            'MAX_ENTRIES': 2000,
+        },
+    }
+}
+
+# Tests : cache en mémoire, propre au processus de test
+if sys.argv[1:2] == ['test']:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -111,15 +153,75 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
 STATIC_URL = '/static/'
+
+# Fichiers du site statique (pages HTML, css, js, images)
+ASCENCEUR_DIR = BASE_DIR / 'ascenceur'
+
+# Images optimisées par `manage.py optimize_images` (même arborescence que
+# ascenceur) : prioritaires sur les originaux quand elles existent
+OPTIMIZED_IMAGES_DIR = BASE_DIR / 'ascenceur_optimized'
+# Manifeste de optimize_images, hors du dossier collecté par collectstatic
+OPTIMIZED_IMAGES_MANIFEST = BASE_DIR / 'ascenceur_optimized.manifest.json'
+
 STATICFILES_DIRS = [
-    BASE_DIR / 'ascenceur',
+    ASCENCEUR_DIR,
 ]
+if OPTIMIZED_IMAGES_DIR.exists():
+    STATICFILES_DIRS.insert(0, OPTIMIZED_IMAGES_DIR)
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Durée de cache navigateur des vidéos servies par /video/ (7 jours) :
+# pour remplacer une vidéo, lui donner un nouveau nom de fichier
+VIDEO_CACHE_MAX_AGE = 7 * 24 * 3600
+
+# Pages ascenceur/*.html prérendues par `manage.py prerender_pages`
+PRERENDERED_PAGES_DIR = STATIC_ROOT / 'pages'
+
 # Media files (uploaded files)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Images redimensionnées à la demande (/media/r/<l>x<h>/...) : dossier de
+# cache partagé par les workers, taille maximale du cache et des images
+RESIZED_IMAGES_CACHE_DIR = os.environ.get('RESIZED_IMAGES_CACHE_DIR')
+RESIZED_IMAGES_CACHE_MAX_BYTES = int(os.environ.get('RESIZED_IMAGES_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+RESIZED_IMAGES_MAX_SIZE = 2400
+
+# Cache en mémoire des pages HTML statiques réécrites (ascenceur/*.html)
+# Invalidé automatiquement quand une page ou un partiel est modifié.
+# Mettre à False pour le désactiver (par exemple en DEBUG).
+STATIC_HTML_CACHE = os.environ.get('STATIC_HTML_CACHE', 'True').lower() == 'true'
+
+# Nombre de versions gzip/brotli gardées en mémoire pour les pages HTML
+# servies depuis un cache (compression.use_compression_cache)
+HTML_COMPRESSION_CACHE_SIZE = 128
+
+# Compteur de vues des articles bufferisé (voir blog/view_counter.py)
+VIEW_COUNTER_BUFFERED = True
+VIEW_COUNTER_FLUSH_INTERVAL = 10  # secondes
+VIEW_COUNTER_SPOOL_DIR = os.environ.get('VIEW_COUNTER_SPOOL_DIR')  # défaut : dossier temporaire
+
+# Vues asynchrones (listes et détails du blog et des projets) : activées par
+# asgi.py, c'est-à-dire en mode ASGI (SERVER_MODE=asgi, workers uvicorn)
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS', 'False').lower() == 'true'
+
+# Serveur : wsgi ou asgi (défini par gunicorn.conf.py, et par asgi.py)
+SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi').lower()
+
+# Préchauffage des workers au démarrage (liftandlight/warmup.py) : templates
+# compilés et URL résolues avant la première requête. Activé en production.
+WARMUP_ON_START = os.environ.get('WARMUP_ON_START', 'False').lower() == 'true'
+
+# Métriques Prometheus sur /metrics (liftandlight/metrics.py), réservées aux
+# adresses de METRICS_ALLOWED_IPS (adresses ou réseaux, séparés par des
+# virgules) ou aux requêtes portant l'en-tête Authorization: Bearer <METRICS_TOKEN>
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+METRICS_ALLOWED_IPS = [
+    address.strip() for address in os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',')
+    if address.strip()
+]
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -13,12 +13,18 @@ DEBUG = os.environ.get('DEBUG', 'False').lower() == 'true'
 ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', '*').split(',')
 
 # Database - utilise DATABASE_URL de l'environnement
+# Connexions persistantes en WSGI seulement. En ASGI, Django 4.2 exécute le
+# code synchrone de chaque requête dans un nouveau thread : sa connexion
+# n'est jamais réutilisée et reste ouverte jusqu'au ramasse-miettes
+# (ticket #33497), et chaque thread de run_parallel garderait la sienne.
+DATABASE_CONN_MAX_AGE = 0 if SERVER_MODE == 'asgi' or ASYNC_VIEWS else 600
+
 DATABASE_URL = os.environ.get('DATABASE_URL')
 if DATABASE_URL:
     DATABASES = {
         'default': dj_database_url.config(
             default=DATABASE_URL,
-            conn_max_age=600,
+            conn_max_age=DATABASE_CONN_MAX_AGE,
             conn_health_checks=True,
         )
     }
@@ -31,6 +37,17 @@ else:
         }
     }
 
+# Templates : chargeur en cache explicite, chaque template n'est lu et
+# compilé qu'une fois par worker (préchauffé au démarrage, voir warmup.py)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+WARMUP_ON_START = os.environ.get('WARMUP_ON_START', 'True').lower() == 'true'
+
 # Static files - WhiteNoise
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
@@ -46,6 +63,12 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 WHITENOISE_USE_FINDERS = False
 WHITENOISE_AUTOREFRESH = DEBUG
 
+# Pages HTML prérendues (manage.py prerender_pages) servies à la racine du site
+# par WhiteNoise ; les pages absentes retombent sur serve_static_html
+PRERENDERED_PAGES_DIR = STATIC_ROOT / 'pages'
+WHITENOISE_ROOT = PRERENDERED_PAGES_DIR
+WHITENOISE_INDEX_FILE = True
+
 # Security settings
 if not DEBUG:
     SECURE_SSL_REDIRECT = False  # La plateforme gère SSL
@@ -33,11 +33,6 @@ else:
         }
     }
 
-# Disable database operations that might fail
-# This prevents Django from trying to access the database during startup
-import django.db.backends.sqlite3.base
-django.db.backends.sqlite3.base.check_sqlite_version = lambda: None
-
 # Static files - use WhiteNoise for Vercel
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
@@ -48,11 +43,54 @@ try:
     STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
     WHITENOISE_USE_FINDERS = False
     WHITENOISE_AUTOREFRESH = DEBUG
+    # Pages HTML prérendues (manage.py prerender_pages)
+    PRERENDERED_PAGES_DIR = STATIC_ROOT / 'pages'
+    WHITENOISE_ROOT = PRERENDERED_PAGES_DIR
+    WHITENOISE_INDEX_FILE = True
 except Exception as e:
     # If WhiteNoise fails, continue without it
     print(f"WhiteNoise setup failed: {e}", file=sys.stderr)
     pass
 
+# Mode public (fonction api/index.py) : le site est en lecture seule, sans
+# admin, authentification, sessions ni messages. Ces applications et leurs
+# middlewares ne sont pas chargés, ce qui réduit le démarrage à froid. L'admin
+# est servi par une autre fonction (api/admin.py, routée sur /admin/ dans
+# vercel.json), qui garde la configuration complète : ses imports ne sont faits
+# que lorsqu'une page de l'admin est demandée.
+PUBLIC_ONLY = os.environ.get('DJANGO_PUBLIC_ONLY', 'False').lower() == 'true'
+
+if PUBLIC_ONLY:
+    PUBLIC_EXCLUDED_APPS = {
+        'django.contrib.admin',
+        'django.contrib.auth',
+        'django.contrib.contenttypes',
+        'django.contrib.sessions',
+        'django.contrib.messages',
+    }
+    PUBLIC_EXCLUDED_MIDDLEWARE = {
+        'django.contrib.sessions.middleware.SessionMiddleware',
+        'django.contrib.auth.middleware.AuthenticationMiddleware',
+        'django.contrib.messages.middleware.MessageMiddleware',
+    }
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in PUBLIC_EXCLUDED_APPS]
+    MIDDLEWARE = [m for m in MIDDLEWARE if m not in PUBLIC_EXCLUDED_MIDDLEWARE]
+    TEMPLATES[0]['OPTIONS']['context_processors'] = [
+        processor for processor in TEMPLATES[0]['OPTIONS']['context_processors']
+        if not processor.startswith(('django.contrib.auth.', 'django.contrib.messages.'))
+    ]
+    AUTH_PASSWORD_VALIDATORS = []
+
+# Compteur de vues écrit directement en base : une instance de la fonction
+# peut être gelée ou recyclée sans exécuter le thread de flush ni atexit,
+# et son dossier /tmp est perdu avec elle
+VIEW_COUNTER_BUFFERED = False
+
+# Pas de métriques Prometheus : chaque instance de la fonction n'aurait que
+# ses propres compteurs, et prometheus_client n'est pas importé au démarrage
+METRICS_ENABLED = False
+MIDDLEWARE = [m for m in MIDDLEWARE if m != 'liftandlight.metrics.MetricsMiddleware']
+
 # Disable some checks that might fail on Vercel
 SILENCED_SYSTEM_CHECKS = ['database.W004']  # Disable database check
 
@@ -0,0 +1,302 @@
+import base64
+import gzip
+import importlib
+import io
+import os
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+
+from . import compression, metrics, resized_images
+from .compression import (
+    BROTLI_AVAILABLE, MIN_LENGTH, negotiate_encoding, parse_accept_encoding, precompressed_page,
+    use_compression_cache,
+)
+
+from .images import PIL_AVAILABLE
+
+if BROTLI_AVAILABLE:
+    import brotli
+
+if PIL_AVAILABLE:
+    from PIL import Image
+
+
+HTML = '<html><body>' + '<p>Lift and Light</p>\n' * 100 + '</body></html>'
+
+
+@precompressed_page
+@condition(etag_func=lambda request: '"v1"')
+def page(request):
+    return HttpResponse(HTML)
+
+
+@precompressed_page
+def short_page(request):
+    return HttpResponse('<p>court</p>')
+
+
+@precompressed_page
+def cached_page(request):
+    return use_compression_cache(HttpResponse(HTML))
+
+
+# Vues du handler Vercel (HandlerTests, ROOT_URLCONF=__name__)
+PNG = b'\x89PNG\r\n\x1a\n\x00\xff\xfe'
+
+
+@csrf_exempt
+def echo(request):
+    return HttpResponse(request.body, content_type='application/octet-stream')
+
+
+def binary(request):
+    return HttpResponse(PNG, content_type='image/png')
+
+
+def cookies(request):
+    response = HttpResponse('ok', content_type='text/plain; charset=utf-8')
+    response.set_cookie('un', '1')
+    response.set_cookie('deux', '2')
+    return response
+
+
+urlpatterns = [
+    path('echo', echo),
+    path('binary', binary),
+    path('cookies', cookies),
+]
+
+
+class NegotiationTests(SimpleTestCase):
+    def test_parse_accept_encoding(self):
+        self.assertEqual(
+            parse_accept_encoding('gzip;q=0.5, br, identity;q=0, x;q=abc'),
+            {'gzip': 0.5, 'br': 1.0, 'identity': 0.0, 'x': 0.0},
+        )
+
+    def test_negotiate(self):
+        self.assertEqual(negotiate_encoding('gzip, br', ('br', 'gzip')), 'br')
+        self.assertEqual(negotiate_encoding('gzip, br;q=0.5', ('br', 'gzip')), 'gzip')
+        self.assertEqual(negotiate_encoding('br;q=0, gzip', ('br', 'gzip')), 'gzip')
+        self.assertEqual(negotiate_encoding('*', ('br', 'gzip')), 'br')
+        self.assertEqual(negotiate_encoding('*, br;q=0', ('br', 'gzip')), 'gzip')
+        self.assertIsNone(negotiate_encoding('identity', ('br', 'gzip')))
+        self.assertIsNone(negotiate_encoding('', ('br', 'gzip')))
+
+
+class PrecompressedPageTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        compression._variants.clear()
+
+    def get(self, view, **headers):
+        return view(self.factory.get('/', **headers))
+
+    def test_gzip(self):
+        response = self.get(page, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(gzip.decompress(response.content).decode(), HTML)
+
+    def test_brotli_preferred(self):
+        if not BROTLI_AVAILABLE:
+            self.skipTest('brotli non installé')
+        response = self.get(page, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content).decode(), HTML)
+
+    def test_identity(self):
+        response = self.get(page)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content.decode(), HTML)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_min_length(self):
+        self.assertLess(len('<p>court</p>'), MIN_LENGTH)
+        response = self.get(short_page, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, b'<p>court</p>')
+
+    def test_same_validator_on_200_and_304(self):
+        compressed = self.get(page, HTTP_ACCEPT_ENCODING='gzip')
+        identity = self.get(page)
+        self.assertEqual(compressed['ETag'], 'W/"v1"')
+        self.assertEqual(identity['ETag'], 'W/"v1"')
+
+        not_modified = self.get(page, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=compressed['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], compressed['ETag'])
+        self.assertIn('Accept-Encoding', not_modified['Vary'])
+
+    def test_not_modified_without_etag(self):
+        response = compression.PrecompressedHTMLMiddleware(lambda request: HttpResponseNotModified())(
+            self.factory.get('/')
+        )
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_compression_cache_is_opt_in(self):
+        self.get(page, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(len(compression._variants), 0)
+
+        first = self.get(cached_page, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(len(compression._variants), 1)
+        second = self.get(cached_page, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(len(compression._variants), 1)
+
+
+class ResizedImagesTests(SimpleTestCase):
+    def setUp(self):
+        if not PIL_AVAILABLE:
+            self.skipTest('Pillow non installé')
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir = cache_dir.name
+        patcher = override_settings(
+            MEDIA_ROOT=media.name,
+            RESIZED_IMAGES_CACHE_DIR=self.cache_dir,
+            RESIZED_IMAGES_MAX_SIZE=200,
+        )
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        Image.new('RGB', (120, 80), 'red').save(os.path.join(media.name, 'photo.jpg'))
+
+    def cached(self):
+        return sorted(
+            name for name in os.listdir(self.cache_dir)
+            if os.path.isfile(os.path.join(self.cache_dir, name))
+        )
+
+    def test_resized(self):
+        response = self.client.get(resized_images.resized_url('photo.jpg', 60, 0))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        with Image.open(io.BytesIO(response.getvalue())) as img:
+            self.assertEqual(img.size, (60, 40))
+        response.close()
+        self.assertEqual(len(self.cached()), 1)
+
+        not_modified = self.client.get(
+            resized_images.resized_url('photo.jpg', 60, 0), HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_bad_signature(self):
+        url = resized_images.resized_url('photo.jpg', 60, 0)
+        self.assertEqual(self.client.get(url[:-1] + 'x').status_code, 403)
+        self.assertEqual(self.client.get(url.split('?')[0]).status_code, 403)
+        self.assertEqual(self.cached(), [])
+
+    def test_traversal(self):
+        request = RequestFactory().get('/', {'s': resized_images.sign(60, 0, '../photo.jpg')})
+        with self.assertRaises(Http404):
+            resized_images.serve(request, 60, 0, '../photo.jpg')
+
+    def test_size_cap(self):
+        for width, height in ((201, 0), (0, 201), (0, 0)):
+            with self.subTest(width=width, height=height):
+                url = resized_images.resized_url('photo.jpg', width, height)
+                self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.cached(), [])
+
+    def test_decompression_bomb(self):
+        # Plus de 2 x MAX_IMAGE_PIXELS : DecompressionBombError
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 100), self.assertLogs(resized_images.logger, 'ERROR'):
+            response = self.client.get(resized_images.resized_url('photo.jpg', 60, 0))
+        self.assertEqual(response.status_code, 404)
+
+    def test_eviction(self):
+        for i, name in enumerate(('ancienne', 'moyenne', 'recente')):
+            path = os.path.join(self.cache_dir, name)
+            with open(path, 'wb') as f:
+                f.write(b'x' * 100)
+            os.utime(path, (1000 + i, 1000 + i))
+        with open(os.path.join(self.cache_dir, 'encours.tmp'), 'wb') as f:
+            f.write(b'x' * 1000)
+        resized_images.evict(self.cache_dir, 250)
+        self.assertEqual(self.cached(), ['encours.tmp', 'moyenne', 'recente'])
+
+
+@override_settings(METRICS_ALLOWED_IPS=['127.0.0.1', '10.0.0.0/8'], METRICS_TOKEN='secret')
+class MetricsAccessTests(SimpleTestCase):
+    def setUp(self):
+        if not metrics.is_enabled():
+            self.skipTest('prometheus_client non installé')
+
+    def get(self, **extra):
+        return self.client.get('/metrics', **extra)
+
+    def test_allowed_addresses(self):
+        for address in ('127.0.0.1', '10.1.2.3'):
+            with self.subTest(address=address):
+                response = self.get(REMOTE_ADDR=address)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(b'liftandlight_http_responses_total', response.content)
+                self.assertEqual(response['Cache-Control'], 'no-store')
+
+    def test_external_address(self):
+        self.assertEqual(self.get(REMOTE_ADDR='203.0.113.7').status_code, 403)
+        # X-Forwarded-For n'est pas pris en compte
+        self.assertEqual(self.get(REMOTE_ADDR='203.0.113.7', HTTP_X_FORWARDED_FOR='127.0.0.1').status_code, 403)
+
+    def test_token(self):
+        self.assertEqual(self.get(REMOTE_ADDR='203.0.113.7', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+        for header in ('Bearer wrong', 'Bearer secre', 'Basic secret', 'secret'):
+            with self.subTest(header=header):
+                self.assertEqual(self.get(REMOTE_ADDR='203.0.113.7', HTTP_AUTHORIZATION=header).status_code, 403)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_no_token_configured(self):
+        self.assertEqual(self.get(REMOTE_ADDR='203.0.113.7', HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class HandlerTests(SimpleTestCase):
+    """Handler Vercel (api/index.py) appelé avec un événement synthétique"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # api/index.py fixe DJANGO_PUBLIC_ONLY pour tout le processus
+        with mock.patch.dict(os.environ):
+            cls.index = importlib.import_module('api.index')
+        cls.index.cold_start_pending = False
+
+    def call(self, path, **attributes):
+        attributes.setdefault('headers', {'host': 'example.com'})
+        return self.index.handler(SimpleNamespace(path=path, **attributes))
+
+    def test_base64_request_body(self):
+        body = bytes(range(256))
+        response = self.call(
+            '/echo', method='POST', body=base64.b64encode(body).decode(), isBase64Encoded=True,
+            headers={'host': 'example.com', 'content-type': 'application/octet-stream'},
+        )
+        self.assertEqual(response['statusCode'], 200)
+        self.assertTrue(response['isBase64Encoded'])
+        self.assertEqual(base64.b64decode(response['body']), body)
+
+    def test_binary_response(self):
+        response = self.call('/binary')
+        self.assertEqual(response['statusCode'], 200)
+        self.assertTrue(response['isBase64Encoded'])
+        self.assertEqual(base64.b64decode(response['body']), PNG)
+
+    def test_text_response(self):
+        response = self.call('/cookies', query={'a': 'b'})
+        self.assertFalse(response['isBase64Encoded'])
+        self.assertEqual(response['body'], 'ok')
+
+    def test_repeated_set_cookie(self):
+        cookies = self.call('/cookies')['headers']['set-cookie']
+        self.assertIsInstance(cookies, list)
+        self.assertEqual([cookie.split(';')[0] for cookie in cookies], ['un=1', 'deux=2'])
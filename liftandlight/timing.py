@@ -0,0 +1,202 @@
+"""
+Mesure du temps passé par requête : en-tête Server-Timing et log structuré
+
+ServerTimingMiddleware ouvre un relevé pour chaque requête (dans une
+ContextVar, donc aussi visible des threads des vues async) et y cumule :
+
+- les requêtes SQL (nombre et durée), via un execute_wrapper installé une
+  fois sur chaque connexion (signal connection_created) ;
+- le rendu des templates, via le backend TimedDjangoTemplates (settings
+  TEMPLATES) : seuls les rendus de premier niveau sont comptés, les
+  {% include %} font partie du rendu qui les contient ;
+- les étapes mesurées avec measure() : réécriture des pages statiques
+  (projets.static_pages), compression (liftandlight.compression) ;
+- les accès aux caches (cache_lookup) : hit ou miss.
+
+La réponse reçoit l'en-tête Server-Timing (lisible dans les outils de
+développement du navigateur) et une ligne JSON est écrite par le logger
+`liftandlight.requests` au niveau INFO. Hors requête, tout ceci ne coûte
+qu'une lecture de ContextVar.
+"""
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db.backends.signals import connection_created
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+logger = logging.getLogger('liftandlight.requests')
+
+_current = ContextVar('liftandlight_request_timings', default=None)
+
+
+class RequestTimings:
+    """Relevé d'une requête : durées cumulées par étape, en secondes"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.durations = {}
+        self.db_queries = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Les vues async exécutent des requêtes SQL dans plusieurs threads
+        self._lock = threading.Lock()
+
+    def add(self, name, duration):
+        with self._lock:
+            self.durations[name] = self.durations.get(name, 0.0) + duration
+
+    def add_cache_lookup(self, hit):
+        with self._lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def add_query(self, duration):
+        with self._lock:
+            self.db_queries += 1
+            self.durations['db'] = self.durations.get('db', 0.0) + duration
+
+    def header(self, total):
+        metrics = [f'total;dur={total * 1000:.1f}']
+        if self.db_queries:
+            metrics.append(f'db;dur={self.durations["db"] * 1000:.1f};desc="{self.db_queries} queries"')
+        for name, duration in self.durations.items():
+            if name != 'db':
+                metrics.append(f'{name};dur={duration * 1000:.1f}')
+        if self.cache_misses:
+            metrics.append('cache;desc="miss"')
+        elif self.cache_hits:
+            metrics.append('cache;desc="hit"')
+        return ', '.join(metrics)
+
+
+def current():
+    """Relevé de la requête en cours, ou None"""
+    return _current.get()
+
+
+@contextmanager
+def measure(name):
+    """Ajoute la durée du bloc à l'étape `name` de la requête en cours"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def cache_lookup(hit):
+    """Compte un accès à un cache de la requête en cours"""
+    timings = _current.get()
+    if timings is not None:
+        timings.add_cache_lookup(hit)
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper : durée de chaque requête SQL"""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add_query(time.perf_counter() - start)
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_wrapper, dispatch_uid='liftandlight.timing')
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        if timings is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.add('tpl', time.perf_counter() - start)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Backend Django standard, dont les rendus sont mesurés"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class ServerTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        total = time.perf_counter() - timings.start
+        header = timings.header(total)
+        existing = response.get('Server-Timing')
+        response['Server-Timing'] = f'{existing}, {header}' if existing else header
+
+        if logger.isEnabledFor(logging.INFO):
+            match = getattr(request, 'resolver_match', None)
+            record = {
+                'method': request.method,
+                'path': request.path,
+                'view': match.view_name if match else None,
+                'status': response.status_code,
+                'ms': round(total * 1000, 2),
+                'db_queries': timings.db_queries,
+                'cache_hits': timings.cache_hits,
+                'cache_misses': timings.cache_misses,
+            }
+            for name, duration in timings.durations.items():
+                record[f'{name}_ms'] = round(duration * 1000, 2)
+            logger.info(json.dumps(record), extra={'timing': record})
+        return response
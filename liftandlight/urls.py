@@ -1,20 +1,32 @@
 """
 URL configuration for liftandlight project.
 """
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from projets import views
+from liftandlight import resized_images
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('', include('projets.urls')),
     path('blog/', include('blog.urls')),
+    # Images redimensionnées à la demande (URL signées)
+    path('media/r/<int:width>x<int:height>/<path:path>', resized_images.serve, name='resized_image'),
     # Servir les fichiers HTML statiques avec remplacement des chemins
     re_path(r'^ascenceur/(?P<path>.*\.html)$', views.serve_static_html),
 ]
 
+# Admin absent en mode public (settings_vercel.PUBLIC_ONLY)
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
+
+# Métriques Prometheus (liftandlight/metrics.py)
+if settings.METRICS_ENABLED:
+    from liftandlight import metrics
+    urlpatterns.append(path('metrics', metrics.metrics_view, name='metrics'))
+
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -0,0 +1,57 @@
+"""
+Cache versionné par espace de noms
+
+Toutes les entrées d'un espace de noms sont rangées sous un numéro de
+version commun : invalidate() change ce numéro, ce qui rend caduques toutes
+les entrées d'un coup, sans durée de vie. Utilisé par blog.caching et
+projets.caching, invalidés par les signaux de chaque application.
+Le cache doit être partagé entre les workers (voir CACHES dans settings).
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from . import timing
+
+
+_MISSING = object()
+
+
+class VersionedCache:
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self.version_key = f'{namespace}:version'
+
+    def get_version(self):
+        """Version courante de l'espace de noms"""
+        # Une version perdue (éviction) est remplacée par une nouvelle valeur,
+        # jamais par une ancienne : les entrées existantes deviennent caduques
+        return cache.get_or_set(self.version_key, time.time_ns, None)
+
+    def invalidate(self):
+        """Rend caduques toutes les entrées de l'espace de noms"""
+        cache.set(self.version_key, time.time_ns(), None)
+
+    def invalidate_on_commit(self):
+        """
+        invalidate() après le COMMIT de la transaction en cours (tout de suite
+        hors transaction) : une requête concurrente ne doit pas reconstruire
+        le cache de la nouvelle version avec les anciennes données. Appelé
+        par les signaux, l'invalidation suit donc aussi tous les autres
+        récepteurs (déclinaisons d'images, index...)
+        """
+        transaction.on_commit(self.invalidate)
+
+    def make_key(self, name):
+        return f'{self.namespace}:{self.get_version()}:{name}'
+
+    def get_or_build(self, name, builder):
+        """Retourne l'entrée `name` du cache, ou la construit avec builder()"""
+        key = self.make_key(name)
+        value = cache.get(key, _MISSING)
+        timing.cache_lookup(value is not _MISSING)
+        if value is _MISSING:
+            value = builder()
+            cache.set(key, value, None)
+        return value
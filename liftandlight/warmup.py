@@ -0,0 +1,127 @@
+"""
+Préchauffage d'un worker : compilation des templates et résolution des URL
+
+warm_up() est appelé au démarrage de l'application (wsgi.py, asgi.py) quand
+WARMUP_ON_START est activé. Avec le chargeur de templates en cache
+(settings_prod), tous les templates du projet sont compilés une fois pour
+toutes, et les tables de résolution des URL (y compris celles de chaque
+namespace) sont construites : la première requête d'un nouveau worker, après
+un déploiement ou un recyclage (max_requests), coûte autant que les suivantes.
+
+warm_caches() et warm_connection() sont appelés par les hooks de gunicorn
+(gunicorn.conf.py) : pages statiques réécrites et compressées, données de la
+sidebar du blog, connexion à la base ouverte avant la première requête.
+"""
+import logging
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.template import engines
+from django.urls import NoReverseMatch, URLResolver, get_resolver, reverse
+
+logger = logging.getLogger(__name__)
+
+
+def project_template_dirs(engine):
+    """Dossiers de templates du projet (pas ceux de Django ou des paquets installés)"""
+    base_dir = Path(settings.BASE_DIR).resolve()
+    for directory in engine.template_dirs:
+        directory = Path(directory).resolve()
+        if directory.is_relative_to(base_dir) and directory.is_dir():
+            yield directory
+
+
+def warm_templates():
+    """Compile tous les templates du projet ; retourne leur nombre"""
+    count = 0
+    for engine in engines.all():
+        for directory in project_template_dirs(engine):
+            for root, _, files in os.walk(directory):
+                for filename in files:
+                    if not filename.endswith(('.html', '.txt', '.xml')):
+                        continue
+                    name = (Path(root) / filename).relative_to(directory).as_posix()
+                    try:
+                        engine.get_template(name)
+                    except Exception:
+                        logger.warning('Préchauffage : template %s non compilé', name, exc_info=True)
+                        continue
+                    count += 1
+    return count
+
+
+def warm_urls(resolver=None, namespace=''):
+    """
+    Construit les tables de résolution de chaque URLconf et namespace et
+    résout tous les noms d'URL ; retourne le nombre de noms.
+    """
+    resolver = resolver or get_resolver()
+    count = 0
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            prefix = f'{namespace}{pattern.namespace}:' if pattern.namespace else namespace
+            count += warm_urls(pattern, prefix)
+        elif pattern.name:
+            try:
+                reverse(f'{namespace}{pattern.name}')
+            except NoReverseMatch:
+                # URL avec paramètres : la table du namespace est tout de même construite
+                pass
+            count += 1
+    return count
+
+
+def warm_static_pages():
+    """Rend et compresse les pages ascenceur/*.html (cache du processus)"""
+    from liftandlight.compression import ENCODINGS
+    from projets import static_pages
+
+    count = 0
+    for name in static_pages.list_pages():
+        content = static_pages.get_page(name)
+        for encoding in ENCODINGS:
+            static_pages.get_compressed(name, content, encoding)
+        count += 1
+    return count
+
+
+def warm_caches():
+    """Préchauffe les caches des pages ; une erreur n'empêche jamais le démarrage"""
+    from blog.views import get_sidebar
+
+    start = time.perf_counter()
+    try:
+        pages = warm_static_pages()
+        get_sidebar()
+    except Exception:
+        logger.exception('Préchauffage des caches interrompu')
+        return None
+    elapsed = (time.perf_counter() - start) * 1000
+    logger.info('Caches préchauffés (pid %s) : %d pages statiques en %.1f ms', os.getpid(), pages, elapsed)
+    return {'pages': pages, 'ms': elapsed}
+
+
+def warm_connection():
+    """Ouvre la connexion à la base du thread courant (gardée selon CONN_MAX_AGE)"""
+    from django.db import connection
+
+    try:
+        connection.ensure_connection()
+    except Exception:
+        logger.warning('Connexion à la base impossible au démarrage', exc_info=True)
+
+
+def warm_up():
+    """Préchauffe le worker courant ; une erreur n'empêche jamais le démarrage"""
+    start = time.perf_counter()
+    try:
+        templates = warm_templates()
+        urls = warm_urls()
+    except Exception:
+        logger.exception('Préchauffage interrompu')
+        return None
+    elapsed = (time.perf_counter() - start) * 1000
+    logger.info('Préchauffage (pid %s) : %d templates, %d URL en %.1f ms', os.getpid(), templates, urls, elapsed)
+    return {'templates': templates, 'urls': urls, 'ms': elapsed}
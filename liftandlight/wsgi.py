@@ -15,3 +15,10 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'liftandlight.settings')
 
 application = get_wsgi_application()
 
+# Templates compilés et URL résolues avant la première requête (WARMUP_ON_START)
+from django.conf import settings  # noqa: E402
+
+if getattr(settings, 'WARMUP_ON_START', False):
+    from liftandlight.warmup import warm_up
+    warm_up()
+
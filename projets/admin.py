@@ -1,7 +1,16 @@
 from django.contrib import admin
+from django.utils.html import format_html
+from liftandlight.resized_images import resized_url
 from .models import Projet, ImageProjet
 
 
+def apercu(field_file):
+    """Miniature 80x60 (redimensionnée à la demande) pour les listes de l'admin"""
+    if not field_file:
+        return '-'
+    return format_html('<img src="{}" width="80" height="60" alt="">', resized_url(field_file.name, 80, 60))
+
+
 class ImageProjetInline(admin.TabularInline):
     model = ImageProjet
     extra = 1
@@ -10,7 +19,7 @@ class ImageProjetInline(admin.TabularInline):
 
 @admin.register(Projet)
 class ProjetAdmin(admin.ModelAdmin):
-    list_display = ('titre', 'categorie', 'date_creation', 'actif')
+    list_display = ('apercu', 'titre', 'categorie', 'date_creation', 'actif')
     list_filter = ('categorie', 'actif', 'date_creation')
     search_fields = ('titre', 'description')
     prepopulated_fields = {'slug': ('titre',)}
@@ -26,10 +35,17 @@ class ProjetAdmin(admin.ModelAdmin):
     )
     readonly_fields = ('date_creation', 'date_modification')
 
+    @admin.display(description='Aperçu')
+    def apercu(self, obj):
+        return apercu(obj.image_principale)
+
 
 @admin.register(ImageProjet)
 class ImageProjetAdmin(admin.ModelAdmin):
-    list_display = ('projet', 'titre', 'ordre', 'date_ajout')
+    list_display = ('apercu', 'projet', 'titre', 'ordre', 'date_ajout')
     list_filter = ('projet', 'date_ajout')
     search_fields = ('projet__titre', 'titre')
 
+    @admin.display(description='Aperçu')
+    def apercu(self, obj):
+        return apercu(obj.image)
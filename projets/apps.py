@@ -5,3 +5,6 @@ class ProjetsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'projets'
 
+    def ready(self):
+        from . import signals  # noqa: F401
+
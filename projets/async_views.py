@@ -0,0 +1,34 @@
+"""
+Versions asynchrones des vues des projets (mode ASGI, settings.ASYNC_VIEWS)
+
+Mêmes pages que projets.views : les accès à la base et au cache se font
+dans un thread, le worker continue de servir les autres connexions.
+"""
+from django.http import HttpResponse
+from django.shortcuts import render
+from liftandlight.async_utils import run_parallel, run_sync
+from liftandlight.compression import precompressed_page, use_compression_cache
+from .views import get_images_projet, get_liste_projets_html, get_page_number, get_projet, normalize_categorie
+
+
+@precompressed_page
+async def liste_projets(request):
+    """Affiche une page de projets actifs (voir projets.views.liste_projets)"""
+    categorie = normalize_categorie(request.GET.get('categorie'))
+    number = get_page_number(request)
+    html = await run_sync(get_liste_projets_html, request, categorie, number)
+    return use_compression_cache(HttpResponse(html))
+
+
+@precompressed_page
+async def projet_detail(request, slug):
+    """Affiche le détail d'un projet ; le projet et sa galerie sont lus en parallèle"""
+    projet, images = await run_parallel(
+        (get_projet, slug),
+        (get_images_projet, slug),
+    )
+    context = {
+        'projet': projet,
+        'images': images,
+    }
+    return await run_sync(render, request, 'projets/projet_detail.html', context)
@@ -0,0 +1,127 @@
+"""
+Django management command to benchmark the serverless cold start
+Usage: python manage.py bench_cold_start [--runs 5] [--path /] [--output bench.json]
+
+Lance plusieurs fois la fonction Vercel (api/index.py) dans un nouveau
+processus Python, avec la configuration complète puis en mode public
+(DJANGO_PUBLIC_ONLY, voir settings_vercel), et compare la durée médiane de
+chaque phase du démarrage à froid ainsi que le nombre de modules importés.
+Avec --output, les mesures sont enregistrées en JSON pour comparer avant et
+après une modification.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+# Exécuté dans chaque processus : import de la fonction puis première requête
+CHILD_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+import api.index as function
+imported = time.perf_counter()
+
+class Request:
+    method = 'GET'
+    path = sys.argv[1]
+    url = ''
+    headers = {'host': 'localhost'}
+    body = b''
+
+response = function.handler(Request())
+print(json.dumps({
+    'phases': function.COLD_START,
+    'import_ms': (imported - start) * 1000,
+    'modules': len(sys.modules),
+    'status': response['statusCode'],
+}))
+'''
+
+MODES = {
+    'full': 'false',
+    'public': 'true',
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the Vercel function cold start, full configuration vs public mode'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=5,
+            help='Cold starts per mode (default: 5)',
+        )
+        parser.add_argument(
+            '--path',
+            default='/',
+            help='Path of the first request (default: /)',
+        )
+        parser.add_argument(
+            '--settings-module',
+            default='liftandlight.settings_vercel',
+            help='Settings used by the function (default: liftandlight.settings_vercel)',
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Write the measurements to this JSON file',
+        )
+
+    def handle(self, *args, **options):
+        runs = max(options['runs'], 1)
+        results = {}
+        for mode, public_only in MODES.items():
+            env = dict(
+                os.environ,
+                DJANGO_SETTINGS_MODULE=options['settings_module'],
+                DJANGO_PUBLIC_ONLY=public_only,
+                VERCEL_LOG_REQUESTS='',
+            )
+            samples = [self.cold_start(env, options['path']) for _ in range(runs)]
+            results[mode] = {
+                'phases': {
+                    phase: statistics.median(sample['phases'][phase] for sample in samples)
+                    for phase in samples[0]['phases']
+                },
+                'import_ms': statistics.median(sample['import_ms'] for sample in samples),
+                'modules': samples[0]['modules'],
+                'status': samples[0]['status'],
+            }
+
+        full, public = results['full'], results['public']
+        self.stdout.write(f'{"phase (médiane)":<24}{"complet":>12}{"public":>12}{"gain":>10}')
+        for phase, full_ms in full['phases'].items():
+            public_ms = public['phases'].get(phase, 0.0)
+            self.stdout.write(
+                f'{phase:<24}{full_ms:>10.1f}ms{public_ms:>10.1f}ms{full_ms - public_ms:>8.1f}ms'
+            )
+        self.stdout.write('=' * 58)
+        self.stdout.write(
+            f'{"import api.index":<24}{full["import_ms"]:>10.1f}ms{public["import_ms"]:>10.1f}ms'
+            f'{full["import_ms"] - public["import_ms"]:>8.1f}ms'
+        )
+        self.stdout.write(f'{"modules":<24}{full["modules"]:>12}{public["modules"]:>12}')
+        self.stdout.write(f'{"statut " + options["path"]:<24}{full["status"]:>12}{public["status"]:>12}')
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'runs': runs, 'path': options['path'], 'results': results}, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'\n✓ Measurements written to {options["output"]}'))
+
+    def cold_start(self, env, path):
+        process = subprocess.run(
+            [sys.executable, '-c', CHILD_SCRIPT, path],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode != 0:
+            raise CommandError(f'Cold start failed:\n{process.stderr}')
+        return json.loads(process.stdout.strip().splitlines()[-1])
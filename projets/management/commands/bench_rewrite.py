@@ -0,0 +1,203 @@
+"""
+Django management command to benchmark the static page rewrite engine
+Usage: python manage.py bench_rewrite [--number 200]
+
+Compare, pour chaque page de ascenceur/, le moteur de réécriture en une
+passe (static_pages.rewrite_page) à l'ancienne chaîne de str.replace/re.sub,
+et vérifie que les deux produisent exactement la même sortie.
+
+legacy_rewrite_page est le code d'origine de serve_static_html, sans
+modification. Une seule règle a changé depuis : les vidéos (src et href
+"video/...") sont servies par la vue projets:video au lieu de
+STATIC_URL/video/. La comparaison applique cette règle à la sortie de
+l'ancien code (adapt_legacy_output) ; les temps mesurés sont ceux de
+l'ancien code seul.
+"""
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.urls import reverse
+import re
+import timeit
+
+from projets import static_pages
+
+
+def legacy_rewrite_page(content, navbar_content, footer_content):
+    """Ancienne implémentation (chaîne de str.replace/re.sub), gardée comme référence"""
+    # Remplacer ou insérer les sections navbar et footer par les fichiers partiels
+    # Pattern pour trouver la navbar (de <nav jusqu'à </nav>)
+    nav_pattern = r'<nav[^>]*>.*?</nav>\s*'
+    if navbar_content:
+        # Si une navbar existe, la remplacer
+        if re.search(nav_pattern, content, flags=re.DOTALL):
+            content = re.sub(nav_pattern, navbar_content, content, flags=re.DOTALL)
+        else:
+            # Sinon, insérer la navbar avant <main> ou après <body>
+            # Nettoyer l'indentation du fichier partiel (enlever les espaces en début de ligne)
+            navbar_clean = '\n'.join(line.lstrip() if line.strip() else line for line in navbar_content.split('\n'))
+            if '<main>' in content:
+                # Trouver l'indentation de <main>
+                main_match = re.search(r'(\s*)<main>', content)
+                indent = main_match.group(1) if main_match else '        '
+                # Indenter le contenu de la navbar
+                navbar_indented = '\n'.join(indent + line if line.strip() else line for line in navbar_clean.split('\n'))
+                content = content.replace('<main>', f'{navbar_indented}\n\n{indent}<main>', 1)
+            elif '<body>' in content:
+                # Trouver l'indentation de <body>
+                body_match = re.search(r'(\s*)<body>', content)
+                indent = body_match.group(1) if body_match else '    '
+                # Insérer après <body> avec la bonne indentation
+                navbar_indented = '\n'.join(indent + line if line.strip() else line for line in navbar_clean.split('\n'))
+                content = content.replace('<body>', f'<body>\n\n{navbar_indented}', 1)
+    
+    # Pattern pour trouver le footer (de <footer jusqu'à </footer>)
+    footer_pattern = r'<footer[^>]*>.*?</footer>\s*'
+    if footer_content:
+        # Si un footer existe, le remplacer
+        if re.search(footer_pattern, content, flags=re.DOTALL):
+            content = re.sub(footer_pattern, footer_content, content, flags=re.DOTALL)
+        else:
+            # Sinon, insérer le footer après </main> ou avant les scripts JavaScript
+            # Nettoyer l'indentation du fichier partiel
+            footer_clean = '\n'.join(line.lstrip() if line.strip() else line for line in footer_content.split('\n'))
+            if '</main>' in content:
+                # Trouver l'indentation de </main>
+                main_match = re.search(r'(\s*)</main>', content)
+                indent = main_match.group(1) if main_match else '        '
+                # Indenter le contenu du footer
+                footer_indented = '\n'.join(indent + line if line.strip() else line for line in footer_clean.split('\n'))
+                content = content.replace('</main>', f'</main>\n\n{footer_indented}', 1)
+            elif '<!-- JAVASCRIPT FILES -->' in content:
+                # Trouver l'indentation du commentaire
+                js_match = re.search(r'(\s*)<!-- JAVASCRIPT FILES -->', content)
+                indent = js_match.group(1) if js_match else '        '
+                footer_indented = '\n'.join(indent + line if line.strip() else line for line in footer_clean.split('\n'))
+                content = content.replace('<!-- JAVASCRIPT FILES -->', f'{footer_indented}\n\n{indent}<!-- JAVASCRIPT FILES -->', 1)
+            elif '<script' in content:
+                # Trouver l'indentation du premier script
+                script_match = re.search(r'(\s*)<script', content)
+                indent = script_match.group(1) if script_match else '        '
+                footer_indented = '\n'.join(indent + line if line.strip() else line for line in footer_clean.split('\n'))
+                content = re.sub(r'(<script)', rf'{footer_indented}\n\n{indent}\1', content, count=1)
+    
+    # Ajouter le bouton WhatsApp flottant avant les scripts JavaScript
+    whatsapp_button = '''        <!-- WhatsApp Floating Button -->
+        <a href="https://wa.me/237696926678?text=Bonjour,%20je%20souhaite%20obtenir%20plus%20d'informations%20sur%20vos%20services" 
+           class="whatsapp-float" 
+           target="_blank" 
+           rel="noopener noreferrer"
+           aria-label="Contactez-nous sur WhatsApp">
+            <i class="bi-whatsapp"></i>
+        </a>
+
+'''
+    
+    # Insérer le bouton WhatsApp avant les scripts JavaScript (seulement s'il n'existe pas déjà)
+    if 'whatsapp-float' not in content:
+        if '<!-- JAVASCRIPT FILES -->' in content:
+            js_match = re.search(r'(\s*)<!-- JAVASCRIPT FILES -->', content)
+            indent = js_match.group(1) if js_match else '        '
+            whatsapp_indented = '\n'.join(indent + line if line.strip() else line for line in whatsapp_button.strip().split('\n'))
+            content = content.replace('<!-- JAVASCRIPT FILES -->', f'{whatsapp_indented}\n{indent}<!-- JAVASCRIPT FILES -->', 1)
+        elif '<script' in content:
+            script_match = re.search(r'(\s*)<script', content)
+            indent = script_match.group(1) if script_match else '        '
+            whatsapp_indented = '\n'.join(indent + line if line.strip() else line for line in whatsapp_button.strip().split('\n'))
+            content = re.sub(r'(<script)', rf'{whatsapp_indented}\n{indent}\1', content, count=1)
+    
+    # Remplacer les chemins relatifs par les chemins statiques Django
+    static_url = settings.STATIC_URL.rstrip('/')  # Enlever le slash final si présent
+    
+    # CSS - avec et sans guillemets
+    content = re.sub(r'href=["\']css/', f'href="{static_url}/css/', content)
+    
+    # Images - avec et sans guillemets
+    content = re.sub(r'(src|href)=["\']images/', rf'\1="{static_url}/images/', content)
+    
+    # JavaScript - avec et sans guillemets
+    content = re.sub(r'src=["\']js/', f'src="{static_url}/js/', content)
+    
+    # Videos - avec et sans guillemets
+    content = re.sub(r'src=["\']video/', f'src="{static_url}/video/', content)
+    
+    # Liens HTML
+    projets_url = reverse("projets:liste_projets")
+    content = content.replace('href="index.html"', 'href="/"')
+    content = content.replace("href='index.html'", "href='/'")
+    content = content.replace('href="projets.html"', f'href="{projets_url}"')
+    content = content.replace("href='projets.html'", f"href='{projets_url}'")
+    content = content.replace('href="about.html"', 'href="/ascenceur/about.html"')
+    content = content.replace("href='about.html'", "href='/ascenceur/about.html'")
+    content = content.replace('href="contact.html"', 'href="/ascenceur/contact.html"')
+    content = content.replace("href='contact.html'", "href='/ascenceur/contact.html'")
+    content = content.replace('href="services.html"', 'href="/ascenceur/services.html"')
+    content = content.replace("href='services.html'", "href='/ascenceur/services.html'")
+    content = content.replace('href="ascenseurs.html"', 'href="/ascenceur/ascenseurs.html"')
+    content = content.replace("href='ascenseurs.html'", "href='/ascenceur/ascenseurs.html'")
+    content = content.replace('href="climatisation.html"', 'href="/ascenceur/climatisation.html"')
+    content = content.replace("href='climatisation.html'", "href='/ascenceur/climatisation.html'")
+    content = content.replace('href="electricite.html"', 'href="/ascenceur/electricite.html"')
+    content = content.replace("href='electricite.html'", "href='/ascenceur/electricite.html'")
+    content = content.replace('href="groupes-electrogenes.html"', 'href="/ascenceur/groupes-electrogenes.html"')
+    content = content.replace("href='groupes-electrogenes.html'", "href='/ascenceur/groupes-electrogenes.html'")
+    
+    return content
+
+
+def adapt_legacy_output(content):
+    """Liens vidéo de l'ancien code réécrits vers la vue projets:video"""
+    static_url = settings.STATIC_URL.rstrip('/')
+    video_url = reverse('projets:video', kwargs={'path': 'x'})[:-1]
+    content = content.replace(f'src="{static_url}/video/', f'src="{video_url}')
+    return re.sub(r'href=["\']video/', f'href="{video_url}', content)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the single-pass rewrite engine against the legacy implementation'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--number',
+            type=int,
+            default=200,
+            help='Iterations per page (default: 200)',
+        )
+
+    def handle(self, *args, **options):
+        number = options['number']
+        _, navbar_path, footer_path = static_pages.get_source_paths('index.html')
+        navbar_content = static_pages._read(navbar_path)
+        footer_content = static_pages._read(footer_path)
+
+        self.stdout.write(f'{"page":<28}{"taille":>9}{"ancien":>12}{"une passe":>12}{"gain":>8}')
+        total_legacy = total_new = 0.0
+        mismatches = 0
+
+        for name in static_pages.list_pages():
+            html_path = static_pages.get_source_paths(name)[0]
+            content = static_pages._read(html_path)
+
+            args = (content, navbar_content, footer_content)
+            if adapt_legacy_output(legacy_rewrite_page(*args)) != static_pages.rewrite_page(*args):
+                mismatches += 1
+                self.stdout.write(self.style.ERROR(f'✗ {name}: sorties différentes'))
+
+            legacy = timeit.timeit(lambda: legacy_rewrite_page(*args), number=number) / number
+            new = timeit.timeit(lambda: static_pages.rewrite_page(*args), number=number) / number
+            total_legacy += legacy
+            total_new += new
+
+            self.stdout.write(
+                f'{name:<28}{len(content) / 1024:>7.1f}KB'
+                f'{legacy * 1000:>10.3f}ms{new * 1000:>10.3f}ms{legacy / new:>7.2f}x'
+            )
+
+        self.stdout.write('=' * 69)
+        self.stdout.write(
+            f'{"total":<37}{total_legacy * 1000:>10.3f}ms{total_new * 1000:>10.3f}ms'
+            f'{total_legacy / total_new:>7.2f}x'
+        )
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f'\n✗ {mismatches} pages differ'))
+        else:
+            self.stdout.write(self.style.SUCCESS('\n✓ Identical output on every page'))
@@ -0,0 +1,38 @@
+"""
+Génère les déclinaisons responsive des images déjà envoyées
+Usage: python manage.py generate_renditions [--force]
+"""
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from liftandlight import renditions
+
+
+class Command(BaseCommand):
+    help = 'Génère les déclinaisons responsive (WebP/JPEG) des images des projets et articles'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Régénère aussi les déclinaisons déjà à jour',
+        )
+
+    def handle(self, *args, **options):
+        if not renditions.PIL_AVAILABLE:
+            self.stdout.write(
+                self.style.ERROR(
+                    'Pillow is not installed. Install it with: pip install Pillow'
+                )
+            )
+            return
+
+        for app_label, model_name, field_name in renditions.RENDITION_FIELDS:
+            model = apps.get_model(app_label, model_name)
+            updated = 0
+            for instance in model._default_manager.iterator():
+                if renditions.update_field(instance, field_name, force=options['force']):
+                    updated += 1
+            self.stdout.write(
+                self.style.SUCCESS(f'✓ {model_name}.{field_name} : {updated} images traitées')
+            )
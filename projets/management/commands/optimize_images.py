@@ -1,21 +1,124 @@
 """
 Django management command to optimize images
-Usage: python manage.py optimize_images
+Usage: python manage.py optimize_images [--webp] [--avif] [--resize] [--jobs N]
+
+Les images de ascenceur/images ne sont jamais modifiées : les versions
+optimisées sont écrites dans OPTIMIZED_IMAGES_DIR (même arborescence), qui
+passe avant ascenceur dans STATICFILES_DIRS. Une version n'est gardée que
+si elle est plus légère que l'original.
+
+Un manifeste (OPTIMIZED_IMAGES_MANIFEST, à côté du dossier de sortie et non
+dedans : collectstatic le publierait) garde l'empreinte
+SHA-256 de chaque image et les options utilisées : une image inchangée
+n'est pas réencodée au lancement suivant, et les sorties des images
+supprimées sont effacées. Le manifeste sert aussi au rendu des pages
+statiques (projets.static_pages), qui proposent les versions WebP/AVIF.
 """
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import hashlib
+import io
+import json
 import os
+from liftandlight.images import (
+    AVIF_AVAILABLE, PIL_AVAILABLE, RESPONSIVE_SIZES, flatten, open_image, resize_max, save_image,
+)
+
+
+# À incrémenter quand l'encodage change : toutes les images sont refaites
+MANIFEST_VERSION = 1
+
+# Formats d'images supportés
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+
+
+def get_manifest_path(output_dir):
+    """Manifeste d'un dossier de sortie : <dossier>.manifest.json, à côté"""
+    if output_dir == Path(settings.OPTIMIZED_IMAGES_DIR):
+        return Path(settings.OPTIMIZED_IMAGES_MANIFEST)
+    return output_dir.with_name(f'{output_dir.name}.manifest.json')
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def encode(img, format, quality, **options):
+    buffer = io.BytesIO()
+    save_image(img, buffer, format, quality, **options)
+    return buffer.getvalue()
+
+
+def write_file(path, data):
+    """Écriture atomique : un fichier servi n'est jamais à moitié écrit"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def optimize_image(source, rel_path, output_dir, quality, create_webp, create_avif, create_resize):
+    """
+    Produit les versions optimisées d'une image (exécuté dans un processus
+    du pool). Retourne la liste des fichiers écrits (chemins relatifs) et
+    les tailles avant/après de l'image principale.
+    """
+    source = Path(source)
+    rel_path = Path(rel_path)
+    output_dir = Path(output_dir)
+    is_jpeg = rel_path.suffix.lower() in ('.jpg', '.jpeg')
+    format = 'JPEG' if is_jpeg else 'PNG'
+    original_size = source.stat().st_size
+    outputs = []
 
-try:
-    from PIL import Image
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
+    def write(path, data):
+        write_file(output_dir / path, data)
+        outputs.append(path.as_posix())
+
+    with open_image(source) as img:
+        if is_jpeg:
+            # Fond blanc pour les images avec transparence
+            img = flatten(img)
+
+        # Version optimisée de l'original, au même chemin
+        data = encode(img, format, quality, progressive=True) if is_jpeg else encode(img, format, quality)
+        optimized_size = original_size
+        if len(data) < original_size:
+            write(rel_path, data)
+            optimized_size = len(data)
+
+        # Versions WebP et AVIF, à côté de l'original
+        for enabled, format, suffix in ((create_webp, 'WEBP', '.webp'), (create_avif, 'AVIF', '.avif')):
+            if not enabled:
+                continue
+            data = encode(img, format, quality)
+            if len(data) < optimized_size:
+                write(rel_path.with_suffix(suffix), data)
+
+        # Versions responsive
+        if create_resize:
+            for size_name, max_size in RESPONSIVE_SIZES.items():
+                if max(img.size) <= max_size:
+                    continue
+                resized = resize_max(img, max_size)
+                resized_path = rel_path.with_name(f'{rel_path.stem}-{size_name}{rel_path.suffix}')
+                write(resized_path, encode(resized, format, quality))
+
+    return {
+        'outputs': outputs,
+        'original_size': original_size,
+        'optimized_size': optimized_size,
+    }
 
 
 class Command(BaseCommand):
-    help = 'Optimize images in the static files directory'
+    help = 'Optimize images in the static files directory (outputs in OPTIMIZED_IMAGES_DIR)'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -29,11 +132,32 @@ class Command(BaseCommand):
             action='store_true',
             help='Create WebP versions of images',
         )
+        parser.add_argument(
+            '--avif',
+            action='store_true',
+            help='Create AVIF versions of images (requires Pillow with AVIF support)',
+        )
         parser.add_argument(
             '--resize',
             action='store_true',
             help='Create responsive versions (small/medium/large)',
         )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of worker processes (default: number of CPUs)',
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Output directory (default: settings.OPTIMIZED_IMAGES_DIR)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-encode every image, even unchanged ones',
+        )
 
     def handle(self, *args, **options):
         if not PIL_AVAILABLE:
@@ -46,140 +170,158 @@ class Command(BaseCommand):
 
         quality = options['quality']
         create_webp = options['webp']
+        create_avif = options['avif']
         create_resize = options['resize']
+        jobs = max(options['jobs'], 1)
+
+        if create_avif and not AVIF_AVAILABLE:
+            # Erreur (code de sortie non nul) : le build peut relancer sans --avif
+            raise CommandError('This Pillow build has no AVIF support')
 
         # Chemin vers les images
-        images_dir = Path(settings.STATICFILES_DIRS[0]) / 'images'
-        
+        source_dir = Path(settings.ASCENCEUR_DIR)
+        images_dir = source_dir / 'images'
+        output_dir = Path(options['output'] or settings.OPTIMIZED_IMAGES_DIR)
+
         if not images_dir.exists():
             self.stdout.write(
                 self.style.ERROR(f'Images directory not found: {images_dir}')
             )
             return
 
-        # Formats d'images supportés
-        image_extensions = {'.jpg', '.jpeg', '.png', '.JPG', '.JPEG', '.PNG'}
-        
+        manifest_path = get_manifest_path(output_dir)
+        manifest = self.load_manifest(manifest_path)
+        entries = manifest['images']
+        signature = f'v{MANIFEST_VERSION}-q{quality}-webp{int(create_webp)}-avif{int(create_avif)}-resize{int(create_resize)}'
+
+        # Images à (ré)encoder : nouvelles, modifiées, options différentes
+        # ou sorties manquantes
+        sources = {}
+        todo = []
+        for image_path in sorted(images_dir.rglob('*')):
+            if image_path.suffix.lower() not in IMAGE_EXTENSIONS or not image_path.is_file():
+                continue
+            rel_path = image_path.relative_to(source_dir).as_posix()
+            digest = file_hash(image_path)
+            sources[rel_path] = digest
+            entry = entries.get(rel_path)
+            if (
+                not options['force']
+                and entry
+                and entry['sha256'] == digest
+                and entry['options'] == signature
+                and all((output_dir / out).exists() for out in entry['outputs'])
+            ):
+                continue
+            todo.append((image_path, rel_path))
+
+        # Sorties des images supprimées
+        removed = 0
+        for rel_path in list(entries):
+            if rel_path not in sources:
+                self.remove_outputs(output_dir, entries.pop(rel_path)['outputs'])
+                removed += 1
+
+        skipped = len(sources) - len(todo)
         optimized_count = 0
-        webp_count = 0
-        resize_count = 0
+        error_count = 0
 
-        for image_path in images_dir.rglob('*'):
-            if image_path.suffix not in image_extensions:
+        def results():
+            args = [
+                (str(path), rel, str(output_dir), quality, create_webp, create_avif, create_resize)
+                for path, rel in todo
+            ]
+            if jobs == 1 or len(todo) <= 1:
+                for arg in args:
+                    yield arg[1], self.run_one(arg)
+                return
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                futures = [(arg[1], executor.submit(optimize_image, *arg)) for arg in args]
+                for rel, future in futures:
+                    try:
+                        yield rel, future.result()
+                    except Exception as e:
+                        yield rel, e
+
+        for rel_path, result in results():
+            name = Path(rel_path).name
+            if isinstance(result, Exception):
+                error_count += 1
+                self.stdout.write(
+                    self.style.ERROR(f'✗ Error processing {name}: {str(result)}')
+                )
                 continue
 
-            try:
-                # Ouvrir l'image
-                with Image.open(image_path) as img:
-                    # Convertir en RGB si nécessaire (pour JPG)
-                    if img.mode in ('RGBA', 'LA', 'P'):
-                        if image_path.suffix.lower() in ('.jpg', '.jpeg'):
-                            # Créer un fond blanc pour les images avec transparence
-                            rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-                            if img.mode == 'P':
-                                img = img.convert('RGBA')
-                            rgb_img.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                            img = rgb_img
-                        else:
-                            img = img.convert('RGB')
-
-                    # Optimiser l'image originale
-                    original_size = image_path.stat().st_size
-                    
-                    if image_path.suffix.lower() in ('.jpg', '.jpeg'):
-                        img.save(
-                            image_path,
-                            'JPEG',
-                            quality=quality,
-                            optimize=True,
-                            progressive=True
-                        )
-                    else:
-                        img.save(
-                            image_path,
-                            'PNG',
-                            optimize=True
-                        )
-
-                    new_size = image_path.stat().st_size
-                    saved = original_size - new_size
-                    saved_percent = (saved / original_size * 100) if original_size > 0 else 0
+            # Sorties d'un encodage précédent qui ne sont plus produites
+            previous = entries.get(rel_path, {}).get('outputs', [])
+            self.remove_outputs(output_dir, set(previous) - set(result['outputs']))
+            entries[rel_path] = {
+                'sha256': sources[rel_path],
+                'options': signature,
+                'outputs': result['outputs'],
+            }
+            optimized_count += 1
 
+            original_size = result['original_size']
+            saved = original_size - result['optimized_size']
+            saved_percent = (saved / original_size * 100) if original_size > 0 else 0
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'✓ {name}: '
+                    f'{original_size / 1024:.1f}KB → {result["optimized_size"] / 1024:.1f}KB '
+                    f'(-{saved_percent:.1f}%)'
+                )
+            )
+            for output in result['outputs']:
+                if output != rel_path:
                     self.stdout.write(
-                        self.style.SUCCESS(
-                            f'✓ {image_path.name}: '
-                            f'{original_size / 1024:.1f}KB → {new_size / 1024:.1f}KB '
-                            f'(-{saved_percent:.1f}%)'
-                        )
+                        self.style.SUCCESS(f'  → Created {Path(output).name}')
                     )
-                    optimized_count += 1
-
-                    # Créer version WebP
-                    if create_webp:
-                        webp_path = image_path.with_suffix('.webp')
-                        img.save(webp_path, 'WEBP', quality=quality, method=6)
-                        webp_count += 1
-                        self.stdout.write(
-                            self.style.SUCCESS(f'  → Created {webp_path.name}')
-                        )
-
-                    # Créer versions responsive
-                    if create_resize:
-                        sizes = {
-                            'small': 480,
-                            'medium': 768,
-                            'large': 1200,
-                        }
-
-                        for size_name, max_size in sizes.items():
-                            if max(img.size) <= max_size:
-                                continue
-
-                            # Calculer les nouvelles dimensions
-                            ratio = min(max_size / max(img.size), 1.0)
-                            new_size = (int(img.size[0] * ratio), int(img.size[1] * ratio))
-
-                            # Redimensionner
-                            resized = img.resize(new_size, Image.Resampling.LANCZOS)
-
-                            # Nom du fichier
-                            size_suffix = f'-{size_name}'
-                            resized_path = image_path.parent / f'{image_path.stem}{size_suffix}{image_path.suffix}'
-
-                            # Sauvegarder
-                            if image_path.suffix.lower() in ('.jpg', '.jpeg'):
-                                resized.save(
-                                    resized_path,
-                                    'JPEG',
-                                    quality=quality,
-                                    optimize=True
-                                )
-                            else:
-                                resized.save(resized_path, 'PNG', optimize=True)
-
-                            resize_count += 1
-                            self.stdout.write(
-                                self.style.SUCCESS(f'  → Created {resized_path.name}')
-                            )
-
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f'✗ Error processing {image_path.name}: {str(e)}')
-                )
+
+        self.save_manifest(manifest_path, manifest)
 
         # Résumé
         self.stdout.write('\n' + '=' * 50)
         self.stdout.write(
             self.style.SUCCESS(
-                f'\n✓ Optimized: {optimized_count} images'
+                f'\n✓ Optimized: {optimized_count} images (jobs: {jobs})'
             )
         )
-        if create_webp:
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Unchanged (skipped): {skipped} images')
+        )
+        if removed:
             self.stdout.write(
-                self.style.SUCCESS(f'✓ WebP created: {webp_count} images')
+                self.style.SUCCESS(f'✓ Removed outputs of {removed} deleted images')
             )
-        if create_resize:
+        if error_count:
             self.stdout.write(
-                self.style.SUCCESS(f'✓ Responsive versions: {resize_count} images')
+                self.style.ERROR(f'✗ Errors: {error_count} images')
             )
 
+    def run_one(self, args):
+        try:
+            return optimize_image(*args)
+        except Exception as e:
+            return e
+
+    def load_manifest(self, path):
+        try:
+            with open(path) as f:
+                manifest = json.load(f)
+            if manifest.get('version') == MANIFEST_VERSION:
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {'version': MANIFEST_VERSION, 'images': {}}
+
+    def save_manifest(self, path, manifest):
+        data = json.dumps(manifest, indent=2, sort_keys=True, ensure_ascii=False)
+        write_file(path, data.encode())
+
+    def remove_outputs(self, output_dir, outputs):
+        for output in outputs:
+            try:
+                (output_dir / output).unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,135 @@
+"""
+Django management command to prerender the static HTML pages
+Usage: python manage.py prerender_pages
+
+Écrit les pages ascenceur/*.html déjà réécrites dans PRERENDERED_PAGES_DIR
+(dans STATIC_ROOT), servi tel quel par WhiteNoise via WHITENOISE_ROOT :
+  - index.html           → /
+  - ascenceur/<page>     → /ascenceur/<page>
+
+Chaque page est aussi écrite en .gz et .br (si brotli est installé) :
+WhiteNoise sert directement ces variantes précompressées.
+
+Une page qui ne peut pas être prérendue n'est pas écrite : la requête
+retombe alors sur la vue dynamique serve_static_html.
+À lancer après collectstatic.
+
+Les pages servies par WhiteNoise ne passent pas par serve_static_html :
+leurs ETag et Last-Modified sont ceux de WhiteNoise (taille et date des
+fichiers écrits ici), pas static_pages.get_etag. Les requêtes
+conditionnelles (304) sont gérées par WhiteNoise avec ces valeurs ; un
+ETag obtenu sur la vue dynamique ne correspond donc pas à celui de la
+même page prérendue.
+
+Les pages sont écrites dans un dossier temporaire voisin, puis échangées
+avec le dossier de sortie. Un dossier de sortie non vide qui n'a pas été
+écrit par cette commande (fichier MARKER_NAME absent) et désigné par
+--output n'est jamais remplacé : une erreur de --output ne peut pas
+effacer un autre dossier.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from pathlib import Path
+import os
+import shutil
+
+from liftandlight.compression import compress_variants
+from projets import static_pages
+
+
+# Fichier témoin d'un dossier écrit par prerender_pages
+MARKER_NAME = '.prerendered'
+
+
+class Command(BaseCommand):
+    help = 'Prerender the ascenceur HTML pages into PRERENDERED_PAGES_DIR'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Output directory (default: settings.PRERENDERED_PAGES_DIR)',
+        )
+
+    def handle(self, *args, **options):
+        final_dir = Path(options['output'] or settings.PRERENDERED_PAGES_DIR)
+        if not self._can_replace(final_dir, explicit=bool(options['output'])):
+            raise CommandError(
+                f'{final_dir} is not empty and was not written by prerender_pages; refusing to replace it'
+            )
+
+        # Rendu dans un dossier vide (pas d'anciennes pages), échangé à la fin
+        final_dir.parent.mkdir(parents=True, exist_ok=True)
+        output_dir = final_dir.with_name(f'.{final_dir.name}.{os.getpid()}.tmp')
+        if output_dir.exists():
+            shutil.rmtree(output_dir)
+        (output_dir / 'ascenceur').mkdir(parents=True)
+        (output_dir / MARKER_NAME).touch()
+
+        rendered_count = 0
+        failed_count = 0
+
+        for name in static_pages.list_pages():
+            try:
+                content = static_pages.render_page(name)
+            except Exception as e:
+                failed_count += 1
+                self.stdout.write(
+                    self.style.WARNING(f'✗ {name}: {e} (servie dynamiquement)')
+                )
+                continue
+
+            # /ascenceur/index.html reste dynamique : WhiteNoise redirigerait
+            # cette URL vers /ascenceur/ (WHITENOISE_INDEX_FILE)
+            if name == 'index.html':
+                targets = [output_dir / 'index.html']
+            else:
+                targets = [output_dir / 'ascenceur' / name]
+
+            body = content.encode('utf-8')
+            variants = compress_variants(body)
+            for target in targets:
+                self._write(target, body)
+                for encoding, compressed in variants.items():
+                    suffix = '.br' if encoding == 'br' else '.gz'
+                    self._write(target.with_name(target.name + suffix), compressed)
+
+            rendered_count += 1
+            self.stdout.write(self.style.SUCCESS(f'✓ {name}'))
+
+        self._swap(output_dir, final_dir)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n✓ Prerendered: {rendered_count} pages → {final_dir}'
+            )
+        )
+        if failed_count:
+            self.stdout.write(
+                self.style.WARNING(f'✗ Failed: {failed_count} pages')
+            )
+
+    def _can_replace(self, final_dir, explicit):
+        """
+        Dossier absent, vide ou écrit par cette commande. PRERENDERED_PAGES_DIR
+        (réglage du projet, pas une saisie) est toujours accepté.
+        """
+        if not final_dir.exists() or not any(final_dir.iterdir()):
+            return True
+        return (final_dir / MARKER_NAME).exists() or not explicit
+
+    def _swap(self, output_dir, final_dir):
+        """Remplace final_dir par output_dir (l'ancien dossier n'est supprimé qu'ensuite)"""
+        old_dir = final_dir.with_name(f'.{final_dir.name}.{os.getpid()}.old')
+        if final_dir.exists():
+            os.replace(final_dir, old_dir)
+        os.replace(output_dir, final_dir)
+        if old_dir.exists():
+            shutil.rmtree(old_dir)
+
+    def _write(self, target, body):
+        """Écrit le fichier de façon atomique"""
+        tmp_path = target.with_name(target.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, target)
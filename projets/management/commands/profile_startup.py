@@ -0,0 +1,177 @@
+"""
+Django management command to profile the application startup
+Usage: python manage.py profile_startup [--template blog/liste_articles.html] [--top 30] [--output startup.json]
+
+Démarre le projet dans un nouveau processus Python (avec -X importtime) et
+mesure la durée de chaque phase : import des settings, django.setup() (dont
+le remplissage du registre des applications), chargement des middlewares,
+import et résolution de l'URLconf, première compilation d'un template. Les
+imports sont détaillés par module et par paquet.
+
+Le résultat est écrit en JSON (sortie standard ou --output) pour suivre les
+régressions d'un déploiement à l'autre. Les settings utilisés sont ceux de
+la commande (DJANGO_SETTINGS_MODULE ou --settings).
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from collections import defaultdict
+import django
+import json
+import os
+import platform
+import subprocess
+import sys
+
+
+# Exécuté dans le processus profilé : chaque phase dans l'ordre du démarrage
+CHILD_SCRIPT = '''
+import json, sys, time
+phases = {}
+last = start = time.perf_counter()
+
+def mark(phase):
+    global last
+    now = time.perf_counter()
+    phases[phase] = (now - last) * 1000
+    # Repère dans la sortie de -X importtime : imports attribués à la phase
+    sys.stderr.write(f'phase: {phase}\\n')
+    last = time.perf_counter()
+
+import django
+from django.conf import settings
+mark('django_import')
+settings.INSTALLED_APPS
+mark('settings_import')
+
+# django.setup() : imports de base et logging, puis registre des applications
+from django.apps import apps
+from django.urls import set_script_prefix
+from django.utils.log import configure_logging
+configure_logging(settings.LOGGING_CONFIG, settings.LOGGING)
+set_script_prefix('/' if settings.FORCE_SCRIPT_NAME is None else settings.FORCE_SCRIPT_NAME)
+mark('setup_core')
+apps.populate(settings.INSTALLED_APPS)
+mark('app_registry')
+
+from django.core.handlers.wsgi import WSGIHandler
+WSGIHandler()
+mark('middleware')
+
+from django.urls import get_resolver
+resolver = get_resolver()
+resolver.url_patterns
+mark('urlconf_import')
+resolver.reverse_dict
+mark('urlconf_populate')
+resolver.resolve('/')
+mark('urlconf_resolve')
+
+from django.template.loader import get_template
+get_template(sys.argv[1])
+mark('template_compile')
+
+phases['django_setup'] = phases['setup_core'] + phases['app_registry']
+print(json.dumps({'phases': phases, 'total_ms': (time.perf_counter() - start) * 1000}))
+'''
+
+
+def parse_importtime(stderr):
+    """
+    Lignes de -X importtime : (module, temps propre, temps cumulé en µs,
+    phase). Les lignes `phase: <nom>` du script marquent la fin d'une phase.
+    """
+    modules = []
+    pending = []
+    for line in stderr.splitlines():
+        if line.startswith('phase: '):
+            phase = line[len('phase: '):].strip()
+            modules.extend((*module, phase) for module in pending)
+            pending = []
+            continue
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            pending.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    modules.extend((*module, 'end') for module in pending)
+    return modules
+
+
+class Command(BaseCommand):
+    help = 'Profile the application startup phases and module imports (JSON output)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--template',
+            default='base.html',
+            help='Template compiled for the first-compile phase (default: base.html)',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=30,
+            help='Number of slowest modules listed (default: 30)',
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Write the JSON report to this file instead of stdout',
+        )
+
+    def handle(self, *args, **options):
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CHILD_SCRIPT, options['template']],
+            cwd=settings.BASE_DIR,
+            env=dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE),
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode != 0:
+            raise CommandError(f'Startup failed:\n{process.stderr[-4000:]}')
+
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        modules = parse_importtime(process.stderr)
+
+        # Temps propre cumulé par paquet de premier niveau (django, PIL, ...)
+        packages = defaultdict(int)
+        by_phase = defaultdict(int)
+        for name, self_us, _, phase in modules:
+            packages[name.split('.')[0]] += self_us
+            by_phase[phase] += self_us
+
+        report = {
+            'settings_module': settings.SETTINGS_MODULE,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'template': options['template'],
+            'phases_ms': {phase: round(ms, 2) for phase, ms in result['phases'].items()},
+            'total_ms': round(result['total_ms'], 2),
+            'imports': {
+                'count': len(modules),
+                'total_self_ms': round(sum(m[1] for m in modules) / 1000, 2),
+                'by_phase_ms': {phase: round(us / 1000, 2) for phase, us in by_phase.items()},
+                'packages_ms': {
+                    name: round(us / 1000, 2)
+                    for name, us in sorted(packages.items(), key=lambda item: -item[1])
+                },
+                'slowest_modules': [
+                    {
+                        'module': name,
+                        'phase': phase,
+                        'self_ms': round(self_us / 1000, 2),
+                        'cumulative_ms': round(cumulative_us / 1000, 2),
+                    }
+                    for name, self_us, cumulative_us, phase in sorted(modules, key=lambda m: -m[1])[:options['top']]
+                ],
+            },
+        }
+
+        data = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(data + '\n')
+            self.stderr.write(self.style.SUCCESS(f'✓ Startup profile written to {options["output"]}'))
+        else:
+            self.stdout.write(data)
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imageprojet',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='projet',
+            name='image_principale_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
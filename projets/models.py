@@ -14,6 +14,8 @@ class Projet(models.Model):
     description = models.TextField()
     categorie = models.CharField(max_length=50, choices=CATEGORIE_CHOICES)
     image_principale = models.ImageField(upload_to='projets/', blank=True, null=True)
+    # Déclinaisons responsive de l'image (voir liftandlight.renditions)
+    image_principale_renditions = models.JSONField(default=dict, blank=True, editable=False)
     date_creation = models.DateTimeField(auto_now_add=True)
     date_modification = models.DateTimeField(auto_now=True)
     actif = models.BooleanField(default=True)
@@ -44,6 +46,7 @@ class Projet(models.Model):
 class ImageProjet(models.Model):
     projet = models.ForeignKey(Projet, related_name='images', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='projets/galeries/')
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     titre = models.CharField(max_length=200, blank=True)
     ordre = models.IntegerField(default=0)
     date_ajout = models.DateTimeField(auto_now_add=True)
@@ -0,0 +1,40 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from liftandlight import renditions
+
+from . import caching
+from .models import ImageProjet, Projet
+
+
+@receiver(post_save, sender=Projet)
+def update_projet_renditions(sender, instance, raw=False, **kwargs):
+    """Génère les déclinaisons responsive d'une nouvelle image principale"""
+    if not raw:
+        renditions.update_field(instance, 'image_principale')
+
+
+@receiver(post_save, sender=ImageProjet)
+def update_image_renditions(sender, instance, raw=False, **kwargs):
+    """Génère les déclinaisons responsive d'une image de galerie"""
+    if not raw:
+        renditions.update_field(instance, 'image')
+
+
+@receiver(post_delete, sender=Projet)
+def delete_projet_renditions(sender, instance, **kwargs):
+    renditions.delete(instance.image_principale_renditions, instance.image_principale.storage)
+
+
+@receiver(post_delete, sender=ImageProjet)
+def delete_image_renditions(sender, instance, **kwargs):
+    renditions.delete(instance.image_renditions, instance.image.storage)
+
+
+@receiver(post_save, sender=Projet)
+@receiver(post_delete, sender=Projet)
+@receiver(post_save, sender=ImageProjet)
+@receiver(post_delete, sender=ImageProjet)
+def invalidate_projets_cache(sender, **kwargs):
+    """Invalide le cache des pages de projets à chaque modification"""
+    caching.invalidate_on_commit()
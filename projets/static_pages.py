@@ -0,0 +1,454 @@
+"""
+Rendu des pages HTML statiques du dossier ascenceur/
+
+Les pages sont réécrites (injection des partiels navbar/footer, bouton
+WhatsApp, chemins statiques et liens) en un seul parcours du document,
+à partir des tables ASSET_PREFIXES et PAGE_LINKS, puis gardées en cache en
+mémoire, par processus, tant que la page, les partiels, le manifeste des
+images et STATIC_URL ne changent pas.
+
+Les <img src="images/..."> dont `manage.py optimize_images` a produit une
+version AVIF ou WebP deviennent des <picture> qui proposent ces formats au
+navigateur. Les versions disponibles sont lues dans le manifeste de
+optimize_images (relu seulement quand il change), jamais en testant
+l'existence des fichiers à chaque requête. Voir `manage.py bench_rewrite` pour comparer à l'ancienne
+implémentation.
+"""
+import hashlib
+import json
+import os
+import posixpath
+import re
+import threading
+from datetime import datetime, timezone
+from functools import lru_cache
+from urllib.parse import quote
+
+from django.conf import settings
+from django.urls import reverse
+
+from liftandlight import timing
+from liftandlight.compression import compress
+
+
+# Version des règles de réécriture, à incrémenter à chaque changement de
+# rewrite_page ou des tables ci-dessous (invalide les ETag des navigateurs)
+REWRITE_VERSION = 3
+
+# Cache des pages rendues : {chemin: (clé, contenu, {encodage: contenu compressé})}
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def get_pages_dir():
+    """Retourne le dossier contenant les pages HTML statiques"""
+    return settings.ASCENCEUR_DIR
+
+
+def list_pages():
+    """Retourne les noms des pages HTML du dossier (hors partiels)"""
+    pages_dir = get_pages_dir()
+    return sorted(
+        name for name in os.listdir(pages_dir)
+        if name.endswith('.html') and os.path.isfile(os.path.join(pages_dir, name))
+    )
+
+
+def _mtime(path):
+    """Retourne la date de modification d'un fichier, ou None s'il n'existe pas"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _read(path):
+    """Lit un fichier texte, ou retourne une chaîne vide s'il n'existe pas"""
+    if not os.path.exists(path):
+        return ""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def get_source_paths(path):
+    """Retourne les chemins de la page et des partiels navbar/footer"""
+    pages_dir = get_pages_dir()
+    partials_dir = os.path.join(pages_dir, 'partials')
+    return (
+        os.path.join(pages_dir, path),
+        os.path.join(partials_dir, 'navbar.html'),
+        os.path.join(partials_dir, 'footer.html'),
+    )
+
+
+def get_manifest_path():
+    """Manifeste des images optimisées, écrit par optimize_images"""
+    return str(settings.OPTIMIZED_IMAGES_MANIFEST)
+
+
+def get_dependency_paths(path):
+    """Fichiers dont dépend la page rendue : sources et manifeste des images"""
+    return get_source_paths(path) + (get_manifest_path(),)
+
+
+def get_cache_key(path):
+    """Clé de cache : dates de modification des dépendances et STATIC_URL"""
+    return tuple(_mtime(p) for p in get_dependency_paths(path)) + (settings.STATIC_URL,)
+
+
+def get_etag(path):
+    """
+    ETag de la page rendue, calculé sans lire ni réécrire les fichiers :
+    dates de modification des dépendances, STATIC_URL et REWRITE_VERSION.
+    Retourne None si la page n'existe pas.
+    """
+    key = get_cache_key(path)
+    if key[0] is None:
+        return None
+    return hashlib.md5(repr((REWRITE_VERSION, path) + key).encode(), usedforsecurity=False).hexdigest()
+
+
+def get_last_modified(path):
+    """Date de dernière modification de la page ou de ses dépendances, ou None"""
+    mtimes = [_mtime(p) for p in get_dependency_paths(path)]
+    if mtimes[0] is None:
+        return None
+    latest = max(m for m in mtimes if m is not None)
+    return datetime.fromtimestamp(latest / 1e9, tz=timezone.utc)
+
+
+# Bouton WhatsApp flottant inséré avant les scripts JavaScript
+WHATSAPP_BUTTON = '''        <!-- WhatsApp Floating Button -->
+        <a href="https://wa.me/237696926678?text=Bonjour,%20je%20souhaite%20obtenir%20plus%20d'informations%20sur%20vos%20services" 
+           class="whatsapp-float" 
+           target="_blank" 
+           rel="noopener noreferrer"
+           aria-label="Contactez-nous sur WhatsApp">
+            <i class="bi-whatsapp"></i>
+        </a>
+
+'''
+
+# Dossiers d'assets réécrits vers STATIC_URL, avec les attributs concernés
+ASSET_PREFIXES = {
+    'css': ('href',),
+    'images': ('src', 'href'),
+    'js': ('src',),
+    'video': ('src', 'href'),
+}
+
+# Assets servis par une vue plutôt que depuis STATIC_URL : dossier -> nom d'URL
+# (les vidéos, pour les requêtes Range, voir projets.views.serve_video)
+ASSET_VIEWS = {
+    'video': 'projets:video',
+}
+
+# Liens entre pages : fichier -> URL (un nom d'URL Django est résolu avec reverse)
+PAGE_LINKS = {
+    'index.html': '/',
+    'projets.html': 'projets:liste_projets',
+    'about.html': '/ascenceur/about.html',
+    'contact.html': '/ascenceur/contact.html',
+    'services.html': '/ascenceur/services.html',
+    'ascenseurs.html': '/ascenceur/ascenseurs.html',
+    'climatisation.html': '/ascenceur/climatisation.html',
+    'electricite.html': '/ascenceur/electricite.html',
+    'groupes-electrogenes.html': '/ascenceur/groupes-electrogenes.html',
+}
+
+# Formats proposés dans <picture>, par ordre de préférence : (extension, type MIME)
+MODERN_IMAGE_FORMATS = (
+    ('avif', 'image/avif'),
+    ('webp', 'image/webp'),
+)
+
+# Emplacements des partiels : sections remplacées, et repères d'insertion
+# utilisés quand la page ne contient pas la section
+NAV_PATTERN = r'<nav[^>]*>.*?</nav>\s*'
+FOOTER_PATTERN = r'<footer[^>]*>.*?</footer>\s*'
+JS_COMMENT = '<!-- JAVASCRIPT FILES -->'
+
+_LINK_PATTERN = (
+    r'(?P<attr>href|src)=(?P<quote>["\'])(?:'
+    r'(?P<asset>' + '|'.join(re.escape(d) for d in ASSET_PREFIXES) + r')/'
+    r'|(?P<page>' + '|'.join(re.escape(p) for p in PAGE_LINKS) + r')(?P=quote))'
+)
+_MARKER_PATTERN = (
+    r'(?P<marker><main>|</main>|<body>|<script|' + re.escape(JS_COMMENT) + r'|whatsapp-float)'
+)
+
+
+_IMG_PATTERN = r'(?P<img><img\b[^>]*>)'
+_IMG_SRC = re.compile(r'\ssrc=(["\'])(images/[^"\']+)\1')
+
+
+@lru_cache(maxsize=None)
+def _compile(with_nav, with_footer, with_images=False):
+    """Compile le motif unique de réécriture selon les partiels disponibles"""
+    parts = []
+    if with_nav:
+        parts.append(r'(?P<nav>' + NAV_PATTERN + r')')
+    if with_footer:
+        parts.append(r'(?P<footer>' + FOOTER_PATTERN + r')')
+    parts.append(_MARKER_PATTERN)
+    if with_images:
+        parts.append(_IMG_PATTERN)
+    parts.append(_LINK_PATTERN)
+    # Le lookahead sur le premier caractère évite d'essayer chaque alternative
+    # à chaque position du document
+    return re.compile(r'(?=[<hsw])(?:' + '|'.join(parts) + ')', flags=re.DOTALL)
+
+
+_LINKS_ONLY = re.compile(_LINK_PATTERN)
+_IMAGES_AND_LINKS = re.compile(_IMG_PATTERN + '|' + _LINK_PATTERN)
+
+
+@lru_cache(maxsize=1)
+def _load_image_formats(manifest_path, mtime):
+    if mtime is None:
+        return {}
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            images = json.load(f).get('images', {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+    formats = {}
+    for source, entry in images.items():
+        stem = posixpath.splitext(source)[0]
+        outputs = set(entry.get('outputs', ()))
+        alternatives = tuple(
+            (mime, f'{stem}.{extension}')
+            for extension, mime in MODERN_IMAGE_FORMATS
+            if f'{stem}.{extension}' in outputs
+        )
+        if alternatives:
+            formats[source] = alternatives
+    return formats
+
+
+def get_image_formats():
+    """
+    Table {chemin d'image: ((type MIME, chemin), ...)} des versions modernes
+    produites par optimize_images, d'après son manifeste.
+    """
+    manifest_path = get_manifest_path()
+    return _load_image_formats(manifest_path, _mtime(manifest_path))
+
+
+def _get_link_map(static_url):
+    """Table des remplacements de liens et de chemins statiques"""
+    pages = {}
+    for name, target in PAGE_LINKS.items():
+        pages[name] = target if target.startswith('/') else reverse(target)
+    static_url = static_url.rstrip('/')
+    prefixes = {asset: f'{static_url}/{asset}/' for asset in ASSET_PREFIXES}
+    for asset, url_name in ASSET_VIEWS.items():
+        # URL de la vue pour un fichier 'x', sans le 'x'
+        prefixes[asset] = reverse(url_name, kwargs={'path': 'x'})[:-1]
+    return static_url, pages, prefixes
+
+
+def _rewrite_link(match, prefixes, pages):
+    """Réécrit un chemin d'asset ou un lien entre pages"""
+    attr = match.group('attr')
+    asset = match.group('asset')
+    if asset is not None:
+        if attr in ASSET_PREFIXES[asset]:
+            return f'{attr}="{prefixes[asset]}'
+        return match.group(0)
+    if attr == 'href':
+        quote = match.group('quote')
+        return f'href={quote}{pages[match.group("page")]}{quote}'
+    return match.group(0)
+
+
+def _rewrite_img(tag, static_url, prefixes, pages, image_formats):
+    """Réécrit une balise <img>, dans un <picture> si d'autres formats existent"""
+    rewritten = _LINKS_ONLY.sub(lambda m: _rewrite_link(m, prefixes, pages), tag)
+    src = _IMG_SRC.search(tag)
+    alternatives = image_formats.get(src.group(2)) if src else None
+    if not alternatives:
+        return rewritten
+    sources = ''.join(
+        f'<source type="{mime}" srcset="{static_url}/{quote(path)}">'
+        for mime, path in alternatives
+    )
+    return f'<picture>{sources}{rewritten}</picture>'
+
+
+def _indent(text, indent, clean=True):
+    """Indente chaque ligne non vide d'un bloc (après nettoyage si `clean`)"""
+    lines = text.split('\n')
+    if clean:
+        lines = [line.lstrip() if line.strip() else line for line in lines]
+    return '\n'.join(indent + line if line.strip() else line for line in lines)
+
+
+def _trailing_whitespace(pieces, index):
+    """Retourne les blancs qui précèdent immédiatement pieces[index] dans la sortie"""
+    whitespace = ''
+    for piece in reversed(pieces[:index]):
+        stripped = piece.rstrip()
+        whitespace = piece[len(stripped):] + whitespace
+        if stripped:
+            break
+    return whitespace
+
+
+def rewrite_page(content, navbar_content, footer_content, image_formats=None):
+    """
+    Applique toutes les réécritures à une page HTML et retourne le résultat.
+    `image_formats` (voir get_image_formats) active le passage des images
+    en <picture>.
+
+    Le document est parcouru une seule fois avec un motif compilé unique
+    (sections navbar/footer, repères d'insertion, images, chemins et liens). Les
+    insertions sont réservées pendant le parcours puis remplies dans l'ordre
+    navbar, footer, bouton WhatsApp, et la sortie est assemblée en un join.
+    """
+    static_url, pages, prefixes = _get_link_map(settings.STATIC_URL)
+
+    def rewrite_item(match):
+        if match.lastgroup == 'img':
+            return _rewrite_img(match.group('img'), static_url, prefixes, pages, image_formats)
+        return _rewrite_link(match, prefixes, pages)
+
+    def rewrite_links(text):
+        if image_formats:
+            return _IMAGES_AND_LINKS.sub(rewrite_item, text)
+        return _LINKS_ONLY.sub(lambda m: _rewrite_link(m, prefixes, pages), text)
+
+    navbar_content = rewrite_links(navbar_content)
+    footer_content = rewrite_links(footer_content)
+
+    pattern = _compile(bool(navbar_content), bool(footer_content), bool(image_formats))
+    pieces = []
+    # Premier emplacement réservé pour chaque repère : {repère: (avant, après)}
+    slots = {}
+    found = set()
+    pos = 0
+
+    for match in pattern.finditer(content):
+        pieces.append(content[pos:match.start()])
+        pos = match.end()
+        kind = match.lastgroup
+        if kind == 'nav':
+            found.add('nav')
+            pieces.append(navbar_content)
+        elif kind == 'footer':
+            found.add('footer')
+            pieces.append(footer_content)
+        elif kind == 'marker':
+            marker = match.group('marker')
+            if marker == 'whatsapp-float':
+                found.add(marker)
+                pieces.append(marker)
+            elif marker in slots:
+                pieces.append(marker)
+            else:
+                # Un emplacement vide de chaque côté du repère
+                slots[marker] = (len(pieces), len(pieces) + 2)
+                pieces.extend(('', marker, ''))
+        elif kind == 'img':
+            tag = match.group('img')
+            if 'whatsapp-float' in tag:
+                found.add('whatsapp-float')
+            pieces.append(_rewrite_img(tag, static_url, prefixes, pages, image_formats))
+        else:
+            pieces.append(_rewrite_link(match, prefixes, pages))
+    pieces.append(content[pos:])
+
+    def insert_before(marker, block, separator, clean=True):
+        index = slots[marker][0]
+        indent = _trailing_whitespace(pieces, index + 1)
+        pieces[index] += f'{_indent(block, indent, clean)}{separator}{indent}'
+
+    def insert_after(marker, block):
+        index = slots[marker][1]
+        indent = _trailing_whitespace(pieces, index - 1)
+        pieces[index] = f'\n\n{_indent(block, indent)}' + pieces[index]
+
+    # Navbar : insérée avant <main> ou après <body> si la page n'en a pas
+    if navbar_content and 'nav' not in found:
+        if '<main>' in slots:
+            insert_before('<main>', navbar_content, '\n\n')
+        elif '<body>' in slots:
+            insert_after('<body>', navbar_content)
+
+    # Footer : inséré après </main>, ou avant les scripts JavaScript
+    if footer_content and 'footer' not in found:
+        if '</main>' in slots:
+            insert_after('</main>', footer_content)
+        elif JS_COMMENT in slots:
+            insert_before(JS_COMMENT, footer_content, '\n\n')
+        elif '<script' in slots:
+            insert_before('<script', footer_content, '\n\n')
+
+    # Bouton WhatsApp avant les scripts JavaScript (seulement s'il n'existe pas déjà)
+    has_whatsapp = (
+        'whatsapp-float' in found
+        or (navbar_content and 'whatsapp-float' in navbar_content)
+        or (footer_content and 'whatsapp-float' in footer_content)
+    )
+    if not has_whatsapp:
+        if JS_COMMENT in slots:
+            insert_before(JS_COMMENT, WHATSAPP_BUTTON.strip(), '\n', clean=False)
+        elif '<script' in slots:
+            insert_before('<script', WHATSAPP_BUTTON.strip(), '\n', clean=False)
+
+    return ''.join(pieces)
+
+
+def render_page(path):
+    """Lit et réécrit une page, sans passer par le cache"""
+    html_path, navbar_path, footer_path = get_source_paths(path)
+    with open(html_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    return rewrite_page(content, _read(navbar_path), _read(footer_path), get_image_formats())
+
+
+def get_page(path):
+    """
+    Retourne la page réécrite, depuis le cache si les sources n'ont pas changé.
+    Le cache peut être désactivé avec STATIC_HTML_CACHE = False.
+    """
+    if not getattr(settings, 'STATIC_HTML_CACHE', True):
+        return render_page(path)
+
+    key = get_cache_key(path)
+    cached = _cache.get(path)
+    timing.cache_lookup(cached is not None and cached[0] == key)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    with timing.measure('rewrite'):
+        content = render_page(path)
+    with _cache_lock:
+        _cache[path] = (key, content, {})
+    return content
+
+
+def get_compressed(path, content, encoding):
+    """
+    Retourne `content` tel que rendu par get_page, compressé dans `encoding` :
+    calculé à la première demande et gardé avec la page en cache.
+    Retourne None si la page n'est pas (ou plus) en cache.
+    """
+    cached = _cache.get(path)
+    if cached is None or cached[1] is not content:
+        return None
+    variants = cached[2]
+    compressed = variants.get(encoding)
+    if compressed is None:
+        with timing.measure('compress'):
+            compressed = compress(content.encode('utf-8'), encoding)
+        with _cache_lock:
+            variants[encoding] = compressed
+    return compressed
+
+
+def clear_cache():
+    """Vide le cache des pages rendues"""
+    with _cache_lock:
+        _cache.clear()
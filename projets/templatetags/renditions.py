@@ -0,0 +1,55 @@
+"""
+Images responsive : {% responsive_image %}
+
+    {% load renditions %}
+    {% responsive_image projet.image_principale projet.image_principale_renditions sizes="(min-width: 992px) 33vw, 100vw" alt=projet.titre class="card-img-top" loading="lazy" %}
+
+Produit un <picture> avec une source WebP et une image JPEG en srcset, à
+partir des déclinaisons générées à l'envoi (liftandlight.renditions). Sans
+déclinaisons, l'image originale est affichée telle quelle.
+
+Pour une autre taille, {% resized_image_url %} donne l'URL signée d'une
+image redimensionnée à la demande (liftandlight.resized_images) :
+
+    {% resized_image_url article.image_principale 1200 630 %}
+"""
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from liftandlight.resized_images import resized_url
+
+register = template.Library()
+
+
+def _srcset(storage, renditions, key):
+    return ', '.join(f'{storage.url(r[key])} {r["width"]}w' for r in renditions)
+
+
+@register.simple_tag
+def responsive_image(image, renditions=None, sizes='100vw', **attrs):
+    if not image:
+        return ''
+
+    attributes = format_html_join('', ' {}="{}"', attrs.items())
+    renditions = (renditions or {}).get('renditions')
+    if not renditions:
+        return format_html('<img src="{}"{}>', image.url, attributes)
+
+    storage = image.storage
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}"{}>'
+        '</picture>',
+        _srcset(storage, renditions, 'webp'), sizes,
+        storage.url(renditions[-1]['jpeg']), _srcset(storage, renditions, 'jpeg'), sizes,
+        attributes,
+    )
+
+
+@register.simple_tag
+def resized_image_url(image, width=0, height=0):
+    """URL signée d'une image (FieldFile ou chemin `static/...`) redimensionnée"""
+    if not image:
+        return ''
+    return resized_url(getattr(image, 'name', image), width, height)
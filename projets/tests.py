@@ -0,0 +1,387 @@
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils.http import http_date
+
+from liftandlight.images import PIL_AVAILABLE
+from liftandlight.ranged_files import RangeNotSatisfiable, parse_range, ranged_file_response
+
+from . import caching, static_pages
+from .models import Projet
+
+if PIL_AVAILABLE:
+    from PIL import Image
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_single_ranges(self):
+        self.assertEqual(parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range('bytes=500-', 1000), (500, 999))
+        # Fin au-delà du fichier : ramenée au dernier octet
+        self.assertEqual(parse_range('bytes=900-5000', 1000), (900, 999))
+
+    def test_suffix_ranges(self):
+        self.assertEqual(parse_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-5000', 1000), (0, 999))
+
+    def test_unsatisfiable_ranges(self):
+        for header, size in (('bytes=1000-', 1000), ('bytes=2000-3000', 1000), ('bytes=-0', 1000), ('bytes=-10', 0)):
+            with self.subTest(header=header, size=size):
+                with self.assertRaises(RangeNotSatisfiable):
+                    parse_range(header, size)
+
+    def test_ignored_headers(self):
+        # Plusieurs plages, unité inconnue, en-tête invalide : fichier entier
+        for header in ('bytes=0-1,5-6', 'bytes=0-1, -5', 'items=0-1', 'bytes=-', 'bytes=abc', 'bytes=9-3'):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range(header, 1000))
+
+
+class RangedFileResponseTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        fd, self.path = tempfile.mkstemp(suffix='.mp4')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(bytes(range(256)) * 4)
+        self.addCleanup(os.remove, self.path)
+        self.size = 1024
+        self.mtime = int(os.stat(self.path).st_mtime)
+
+    def get(self, **headers):
+        response = ranged_file_response(self.factory.get('/video/x.mp4', **headers), self.path)
+        self.addCleanup(response.close)
+        return response
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_full_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(len(self.body(response)), self.size)
+
+    def test_partial_content(self):
+        response = self.get(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{self.size}')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(self.body(response), bytes(range(10, 20)))
+
+    def test_suffix_range(self):
+        response = self.get(HTTP_RANGE='bytes=-4')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 1020-1023/{self.size}')
+        self.assertEqual(self.body(response), bytes(range(252, 256)))
+
+    def test_multiple_ranges_send_whole_file(self):
+        response = self.get(HTTP_RANGE='bytes=0-9,20-29')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Content-Range'))
+        self.assertEqual(len(self.body(response)), self.size)
+
+    def test_unsatisfiable_range(self):
+        response = self.get(HTTP_RANGE=f'bytes={self.size}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{self.size}')
+
+    def test_if_range(self):
+        etag = self.get()['ETag']
+        cases = (
+            (etag, 206),
+            ('"autre"', 200),
+            (f'W/{etag}', 200),  # comparaison forte : jamais un ETag faible
+            (http_date(self.mtime), 206),
+            (http_date(self.mtime - 3600), 200),
+        )
+        for if_range, status in cases:
+            with self.subTest(if_range=if_range):
+                response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=if_range)
+                self.assertEqual(response.status_code, status)
+
+    def test_not_modified(self):
+        etag = self.get()['ETag']
+        response = self.get(HTTP_IF_NONE_MATCH=etag, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 304)
+
+
+class ServeVideoTests(SimpleTestCase):
+    def test_traversal_is_not_found(self):
+        for url in ('/video/..%2Fcss%2Fstyles.css', '/video/..%2F..%2Fmanage.py'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+
+NAVBAR = '<nav>\n    <a href="index.html">Accueil</a>\n</nav>\n'
+FOOTER = '<footer>Pied</footer>\n'
+
+PAGE = """<head>
+    <link href="css/site.css" rel="stylesheet">
+</head>
+<body>
+    <nav class="old">ancienne</nav>
+    <main>
+        <img src="images/logo.png" alt="Logo">
+        <video><source src="video/intro.mp4" type="video/mp4"></video>
+        <a href="video/intro.mp4">Vidéo</a>
+        <a href='about.html'>À propos</a>
+        <a href="projets.html">Projets</a>
+    </main>
+    <footer>ancien</footer>
+    <a class="whatsapp-float" href="https://wa.me/1">WhatsApp</a>
+    <script src="js/app.js"></script>
+</body>
+"""
+
+EXPECTED_PAGE = """<head>
+    <link href="/s/css/site.css" rel="stylesheet">
+</head>
+<body>
+    <nav>
+    <a href="/">Accueil</a>
+</nav>
+<main>
+        <picture><source type="image/avif" srcset="/s/images/logo.avif"><source type="image/webp" srcset="/s/images/logo.webp"><img src="/s/images/logo.png" alt="Logo"></picture>
+        <video><source src="/video/intro.mp4" type="video/mp4"></video>
+        <a href="/video/intro.mp4">Vidéo</a>
+        <a href='/ascenceur/about.html'>À propos</a>
+        <a href="/projets/">Projets</a>
+    </main>
+    <footer>Pied</footer>
+<a class="whatsapp-float" href="https://wa.me/1">WhatsApp</a>
+    <script src="/s/js/app.js"></script>
+</body>
+"""
+
+
+@override_settings(STATIC_URL='/s/')
+class RewritePageTests(SimpleTestCase):
+    def write_manifest(self, directory):
+        path = os.path.join(directory, 'manifest.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'images': {
+                'images/logo.png': {
+                    'hash': 'ab' * 32,
+                    'outputs': ['images/logo.png', 'images/logo.webp', 'images/logo.avif'],
+                },
+                'images/autre.jpg': {'hash': 'cd' * 32, 'outputs': ['images/autre.jpg']},
+            }}, f)
+        return path
+
+    def test_expected_page(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(OPTIMIZED_IMAGES_MANIFEST=self.write_manifest(directory)):
+                image_formats = static_pages.get_image_formats()
+        self.assertEqual(image_formats, {
+            'images/logo.png': (('image/avif', 'images/logo.avif'), ('image/webp', 'images/logo.webp')),
+        })
+        self.assertEqual(static_pages.rewrite_page(PAGE, NAVBAR, FOOTER, image_formats), EXPECTED_PAGE)
+
+    def test_without_manifest(self):
+        with override_settings(OPTIMIZED_IMAGES_MANIFEST='/nonexistent/manifest.json'):
+            self.assertEqual(static_pages.get_image_formats(), {})
+        rewritten = static_pages.rewrite_page(PAGE, NAVBAR, FOOTER)
+        self.assertNotIn('<picture>', rewritten)
+        self.assertIn('<img src="/s/images/logo.png" alt="Logo">', rewritten)
+
+    def test_inserted_partials(self):
+        page = (
+            '<body>\n    <main>\n        <p>x</p>\n    </main>\n'
+            '    <!-- JAVASCRIPT FILES -->\n    <script src="js/app.js"></script>\n</body>\n'
+        )
+        rewritten = static_pages.rewrite_page(page, NAVBAR, FOOTER)
+        positions = [rewritten.index(marker) for marker in (
+            '<a href="/">Accueil</a>', '<main>', '</main>', FOOTER.strip(),
+            'class="whatsapp-float"', '<!-- JAVASCRIPT FILES -->', 'src="/s/js/app.js"',
+        )]
+        self.assertEqual(positions, sorted(positions))
+        self.assertEqual(rewritten.count('whatsapp-float'), 1)
+
+
+class PrerenderPagesTests(SimpleTestCase):
+    def prerender(self, output_dir):
+        call_command('prerender_pages', output=str(output_dir), stdout=io.StringIO())
+
+    def test_refuses_foreign_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = Path(directory) / 'keep.py'
+            source.write_text('x = 1\n')
+            with self.assertRaises(CommandError):
+                self.prerender(directory)
+            self.assertEqual(source.read_text(), 'x = 1\n')
+
+    def test_replaces_own_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output_dir = Path(directory) / 'pages'
+            self.prerender(output_dir)
+            stale = output_dir / 'ascenceur' / 'ancienne.html'
+            stale.write_text('ancienne')
+            self.prerender(output_dir)
+            self.assertFalse(stale.exists())
+            self.assertTrue((output_dir / 'index.html').exists())
+            self.assertEqual(os.listdir(directory), ['pages'])
+
+
+class OptimizeImagesTests(SimpleTestCase):
+    """Manifeste de optimize_images : seules les images modifiées sont refaites"""
+
+    def setUp(self):
+        if not PIL_AVAILABLE:
+            self.skipTest('Pillow non installé')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.source_dir = Path(directory.name) / 'ascenceur'
+        self.output_dir = Path(directory.name) / 'optimized'
+        (self.source_dir / 'images').mkdir(parents=True)
+        for name in ('une.jpg', 'deux.jpg'):
+            self.add_image(name)
+        patcher = override_settings(ASCENCEUR_DIR=self.source_dir)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+    def add_image(self, name):
+        # Bruit en qualité maximale : la version optimisée est plus légère
+        img = Image.frombytes('RGB', (64, 64), os.urandom(64 * 64 * 3))
+        img.save(self.source_dir / 'images' / name, quality=100)
+
+    def optimize(self, *args):
+        out = io.StringIO()
+        call_command('optimize_images', '--jobs', '1', '--output', str(self.output_dir), *args, stdout=out)
+        return out.getvalue()
+
+    def manifest(self):
+        path = self.output_dir.with_name('optimized.manifest.json')
+        return json.loads(path.read_text())['images']
+
+    def test_unchanged_images_are_skipped(self):
+        self.assertIn('Optimized: 2 images', self.optimize())
+        self.assertIn('images/une.jpg', self.manifest())
+        self.assertTrue((self.output_dir / 'images' / 'une.jpg').exists())
+        output = self.optimize()
+        self.assertIn('Optimized: 0 images', output)
+        self.assertIn('Unchanged (skipped): 2 images', output)
+
+        self.add_image('une.jpg')
+        self.assertIn('Optimized: 1 images', self.optimize())
+
+    def test_changed_options_reencode(self):
+        self.optimize()
+        self.assertIn('Optimized: 2 images', self.optimize('--quality', '70'))
+        self.assertEqual({entry['options'] for entry in self.manifest().values()}, {'v1-q70-webp0-avif0-resize0'})
+
+    def test_deleted_image_outputs_are_removed(self):
+        self.optimize()
+        (self.source_dir / 'images' / 'deux.jpg').unlink()
+        self.assertIn('Removed outputs of 1 deleted images', self.optimize())
+        self.assertFalse((self.output_dir / 'images' / 'deux.jpg').exists())
+        self.assertEqual(list(self.manifest()), ['images/une.jpg'])
+
+
+class StaticPagesDirMixin:
+    """ASCENCEUR_DIR temporaire : une page et les partiels navbar/footer"""
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.pages_dir = Path(directory.name)
+        (self.pages_dir / 'partials').mkdir()
+        self.write('partials/navbar.html', NAVBAR)
+        self.write('partials/footer.html', FOOTER)
+        self.write('essai.html', PAGE)
+        patcher = override_settings(
+            ASCENCEUR_DIR=self.pages_dir,
+            OPTIMIZED_IMAGES_MANIFEST=self.pages_dir / 'manifest.json',
+            STATIC_HTML_CACHE=True,
+        )
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+        static_pages.clear_cache()
+        self.addCleanup(static_pages.clear_cache)
+
+    def write(self, name, content):
+        """Écrit un fichier avec une date de modification toujours nouvelle"""
+        path = self.pages_dir / name
+        previous = path.stat().st_mtime_ns if path.exists() else 0
+        path.write_text(content, encoding='utf-8')
+        mtime = max(previous + 10 ** 9, path.stat().st_mtime_ns)
+        os.utime(path, ns=(mtime, mtime))
+
+
+class StaticPagesCacheTests(StaticPagesDirMixin, SimpleTestCase):
+    def test_cached_until_page_changes(self):
+        first = static_pages.get_page('essai.html')
+        self.assertIs(static_pages.get_page('essai.html'), first)
+
+        self.write('essai.html', PAGE.replace('Projets</a>', 'Nos projets</a>'))
+        second = static_pages.get_page('essai.html')
+        self.assertIn('Nos projets', second)
+        self.assertIs(static_pages.get_page('essai.html'), second)
+
+    def test_partial_change_invalidates(self):
+        static_pages.get_page('essai.html')
+        self.write('partials/footer.html', '<footer>Nouveau pied</footer>\n')
+        self.assertIn('Nouveau pied', static_pages.get_page('essai.html'))
+
+    def test_manifest_change_invalidates(self):
+        self.assertNotIn('<picture>', static_pages.get_page('essai.html'))
+        self.write('manifest.json', json.dumps({'version': 1, 'images': {
+            'images/logo.png': {'hash': 'ab' * 32, 'outputs': ['images/logo.png', 'images/logo.webp']},
+        }}))
+        self.assertIn('<source type="image/webp"', static_pages.get_page('essai.html'))
+
+    def test_static_url_change_invalidates(self):
+        static_pages.get_page('essai.html')
+        with override_settings(STATIC_URL='/cdn/'):
+            self.assertIn('href="/cdn/css/site.css"', static_pages.get_page('essai.html'))
+
+
+class StaticHtmlConditionalTests(StaticPagesDirMixin, SimpleTestCase):
+    url = '/ascenceur/essai.html'
+
+    def test_etag_and_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        # ETag faible : la page peut être servie compressée (liftandlight.compression)
+        self.assertEqual(etag, f'W/"{static_pages.get_etag("essai.html")}"')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_after_edit(self):
+        etag = self.client.get(self.url)['ETag']
+        self.write('essai.html', PAGE.replace('Projets</a>', 'Nos projets</a>'))
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Nos projets', response.content.decode())
+
+    def test_missing_page(self):
+        self.assertEqual(self.client.get('/ascenceur/absente.html').status_code, 404)
+
+
+class CacheInvalidationTests(TestCase):
+    """La version du cache des projets ne change qu'après le COMMIT"""
+
+    def assertInvalidatedOnCommit(self, change):
+        version = caching.get_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+            self.assertEqual(caching.get_version(), version)
+        self.assertNotEqual(caching.get_version(), version)
+
+    def test_save_and_delete(self):
+        projet = Projet(titre='Invalidé', description='.', categorie='ascenseur', slug='invalide')
+        self.assertInvalidatedOnCommit(projet.save)
+        self.assertInvalidatedOnCommit(projet.delete)
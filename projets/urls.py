@@ -1,11 +1,17 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Mode ASGI : versions async des vues
+vues = async_views if settings.ASYNC_VIEWS else views
 
 app_name = 'projets'
 
 urlpatterns = [
     path('', views.accueil, name='accueil'),
-    path('projets/', views.liste_projets, name='liste_projets'),
-    path('projets/<slug:slug>/', views.projet_detail, name='projet_detail'),
+    path('projets/', vues.liste_projets, name='liste_projets'),
+    path('projets/fragment/', views.liste_projets_fragment, name='liste_projets_fragment'),
+    path('projets/<slug:slug>/', vues.projet_detail, name='projet_detail'),
+    path('video/<path:path>', views.serve_video, name='video'),
 ]
 
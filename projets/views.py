@@ -1,158 +1,68 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import Http404, HttpResponse
+from django.template.loader import render_to_string
+from django.http import Http404, HttpResponse, JsonResponse
+from django.core.paginator import InvalidPage, Paginator
 from django.urls import reverse
+from django.utils.http import urlencode
+from django.views.decorators.http import condition, require_safe
 from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.contrib.staticfiles import finders
+from django.utils._os import safe_join
 import os
-import re
+from functools import partial
+from liftandlight.compression import precompressed_page, use_compression_cache
+from liftandlight.ranged_files import ranged_file_response
 from .models import Projet, ImageProjet
+from . import caching, static_pages
 
 
+def _static_html_etag(request, path):
+    return static_pages.get_etag(path)
+
+
+def _static_html_last_modified(request, path):
+    return static_pages.get_last_modified(path)
+
+
+# Répond 304 (If-None-Match / If-Modified-Since) avant toute lecture de fichier
+@precompressed_page
+@condition(etag_func=_static_html_etag, last_modified_func=_static_html_last_modified)
 def serve_static_html(request, path):
     """Sert les fichiers HTML statiques en remplaçant les chemins relatifs par les chemins statiques Django"""
     # Le path depuis l'URL regex est juste le nom du fichier (ex: about.html)
     # On doit le chercher dans le dossier ascenceur
-    html_path = os.path.join(settings.STATICFILES_DIRS[0], path)
+    html_path = os.path.join(static_pages.get_pages_dir(), path)
     
     if not os.path.exists(html_path):
         raise Http404(f"Fichier {path} non trouvé")
     
-    # Lire les fichiers partiels
-    partials_dir = os.path.join(settings.STATICFILES_DIRS[0], 'partials')
-    navbar_path = os.path.join(partials_dir, 'navbar.html')
-    footer_path = os.path.join(partials_dir, 'footer.html')
-    
-    navbar_content = ""
-    footer_content = ""
-    
-    if os.path.exists(navbar_path):
-        with open(navbar_path, 'r', encoding='utf-8') as f:
-            navbar_content = f.read()
-    
-    if os.path.exists(footer_path):
-        with open(footer_path, 'r', encoding='utf-8') as f:
-            footer_content = f.read()
-    
-    with open(html_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Remplacer ou insérer les sections navbar et footer par les fichiers partiels
-    # Pattern pour trouver la navbar (de <nav jusqu'à </nav>)
-    nav_pattern = r'<nav[^>]*>.*?</nav>\s*'
-    if navbar_content:
-        # Si une navbar existe, la remplacer
-        if re.search(nav_pattern, content, flags=re.DOTALL):
-            content = re.sub(nav_pattern, navbar_content, content, flags=re.DOTALL)
-        else:
-            # Sinon, insérer la navbar avant <main> ou après <body>
-            # Nettoyer l'indentation du fichier partiel (enlever les espaces en début de ligne)
-            navbar_clean = '\n'.join(line.lstrip() if line.strip() else line for line in navbar_content.split('\n'))
-            if '<main>' in content:
-                # Trouver l'indentation de <main>
-                main_match = re.search(r'(\s*)<main>', content)
-                indent = main_match.group(1) if main_match else '        '
-                # Indenter le contenu de la navbar
-                navbar_indented = '\n'.join(indent + line if line.strip() else line for line in navbar_clean.split('\n'))
-                content = content.replace('<main>', f'{navbar_indented}\n\n{indent}<main>', 1)
-            elif '<body>' in content:
-                # Trouver l'indentation de <body>
-                body_match = re.search(r'(\s*)<body>', content)
-                indent = body_match.group(1) if body_match else '    '
-                # Insérer après <body> avec la bonne indentation
-                navbar_indented = '\n'.join(indent + line if line.strip() else line for line in navbar_clean.split('\n'))
-                content = content.replace('<body>', f'<body>\n\n{navbar_indented}', 1)
-    
-    # Pattern pour trouver le footer (de <footer jusqu'à </footer>)
-    footer_pattern = r'<footer[^>]*>.*?</footer>\s*'
-    if footer_content:
-        # Si un footer existe, le remplacer
-        if re.search(footer_pattern, content, flags=re.DOTALL):
-            content = re.sub(footer_pattern, footer_content, content, flags=re.DOTALL)
-        else:
-            # Sinon, insérer le footer après </main> ou avant les scripts JavaScript
-            # Nettoyer l'indentation du fichier partiel
-            footer_clean = '\n'.join(line.lstrip() if line.strip() else line for line in footer_content.split('\n'))
-            if '</main>' in content:
-                # Trouver l'indentation de </main>
-                main_match = re.search(r'(\s*)</main>', content)
-                indent = main_match.group(1) if main_match else '        '
-                # Indenter le contenu du footer
-                footer_indented = '\n'.join(indent + line if line.strip() else line for line in footer_clean.split('\n'))
-                content = content.replace('</main>', f'</main>\n\n{footer_indented}', 1)
-            elif '<!-- JAVASCRIPT FILES -->' in content:
-                # Trouver l'indentation du commentaire
-                js_match = re.search(r'(\s*)<!-- JAVASCRIPT FILES -->', content)
-                indent = js_match.group(1) if js_match else '        '
-                footer_indented = '\n'.join(indent + line if line.strip() else line for line in footer_clean.split('\n'))
-                content = content.replace('<!-- JAVASCRIPT FILES -->', f'{footer_indented}\n\n{indent}<!-- JAVASCRIPT FILES -->', 1)
-            elif '<script' in content:
-                # Trouver l'indentation du premier script
-                script_match = re.search(r'(\s*)<script', content)
-                indent = script_match.group(1) if script_match else '        '
-                footer_indented = '\n'.join(indent + line if line.strip() else line for line in footer_clean.split('\n'))
-                content = re.sub(r'(<script)', rf'{footer_indented}\n\n{indent}\1', content, count=1)
-    
-    # Ajouter le bouton WhatsApp flottant avant les scripts JavaScript
-    whatsapp_button = '''        <!-- WhatsApp Floating Button -->
-        <a href="https://wa.me/237696926678?text=Bonjour,%20je%20souhaite%20obtenir%20plus%20d'informations%20sur%20vos%20services" 
-           class="whatsapp-float" 
-           target="_blank" 
-           rel="noopener noreferrer"
-           aria-label="Contactez-nous sur WhatsApp">
-            <i class="bi-whatsapp"></i>
-        </a>
-
-'''
-    
-    # Insérer le bouton WhatsApp avant les scripts JavaScript (seulement s'il n'existe pas déjà)
-    if 'whatsapp-float' not in content:
-        if '<!-- JAVASCRIPT FILES -->' in content:
-            js_match = re.search(r'(\s*)<!-- JAVASCRIPT FILES -->', content)
-            indent = js_match.group(1) if js_match else '        '
-            whatsapp_indented = '\n'.join(indent + line if line.strip() else line for line in whatsapp_button.strip().split('\n'))
-            content = content.replace('<!-- JAVASCRIPT FILES -->', f'{whatsapp_indented}\n{indent}<!-- JAVASCRIPT FILES -->', 1)
-        elif '<script' in content:
-            script_match = re.search(r'(\s*)<script', content)
-            indent = script_match.group(1) if script_match else '        '
-            whatsapp_indented = '\n'.join(indent + line if line.strip() else line for line in whatsapp_button.strip().split('\n'))
-            content = re.sub(r'(<script)', rf'{whatsapp_indented}\n{indent}\1', content, count=1)
-    
-    # Remplacer les chemins relatifs par les chemins statiques Django
-    static_url = settings.STATIC_URL.rstrip('/')  # Enlever le slash final si présent
-    
-    # CSS - avec et sans guillemets
-    content = re.sub(r'href=["\']css/', f'href="{static_url}/css/', content)
-    
-    # Images - avec et sans guillemets
-    content = re.sub(r'(src|href)=["\']images/', rf'\1="{static_url}/images/', content)
-    
-    # JavaScript - avec et sans guillemets
-    content = re.sub(r'src=["\']js/', f'src="{static_url}/js/', content)
-    
-    # Videos - avec et sans guillemets
-    content = re.sub(r'src=["\']video/', f'src="{static_url}/video/', content)
-    
-    # Liens HTML
-    projets_url = reverse("projets:liste_projets")
-    content = content.replace('href="index.html"', 'href="/"')
-    content = content.replace("href='index.html'", "href='/'")
-    content = content.replace('href="projets.html"', f'href="{projets_url}"')
-    content = content.replace("href='projets.html'", f"href='{projets_url}'")
-    content = content.replace('href="about.html"', 'href="/ascenceur/about.html"')
-    content = content.replace("href='about.html'", "href='/ascenceur/about.html'")
-    content = content.replace('href="contact.html"', 'href="/ascenceur/contact.html"')
-    content = content.replace("href='contact.html'", "href='/ascenceur/contact.html'")
-    content = content.replace('href="services.html"', 'href="/ascenceur/services.html"')
-    content = content.replace("href='services.html'", "href='/ascenceur/services.html'")
-    content = content.replace('href="ascenseurs.html"', 'href="/ascenceur/ascenseurs.html"')
-    content = content.replace("href='ascenseurs.html'", "href='/ascenceur/ascenseurs.html'")
-    content = content.replace('href="climatisation.html"', 'href="/ascenceur/climatisation.html"')
-    content = content.replace("href='climatisation.html'", "href='/ascenceur/climatisation.html'")
-    content = content.replace('href="electricite.html"', 'href="/ascenceur/electricite.html"')
-    content = content.replace("href='electricite.html'", "href='/ascenceur/electricite.html'")
-    content = content.replace('href="groupes-electrogenes.html"', 'href="/ascenceur/groupes-electrogenes.html"')
-    content = content.replace("href='groupes-electrogenes.html'", "href='/ascenceur/groupes-electrogenes.html'")
-    
-    return HttpResponse(content)
+    content = static_pages.get_page(path)
+    response = HttpResponse(content)
+    # Compressée seulement si le client l'accepte, une fois par encodage
+    response.compressor = partial(static_pages.get_compressed, path, content)
+    return response
+
+
+@require_safe
+def serve_video(request, path):
+    """
+    Sert les vidéos du dossier video/ des fichiers statiques, avec prise en
+    charge de Range/If-Range (lecture et déplacement dans la vidéo sans
+    tout télécharger) et envoi par sendfile.
+    """
+    try:
+        # Base video/ : un chemin en ../ ne sort pas du dossier des vidéos
+        video_path = safe_join(os.path.join(settings.STATIC_ROOT, 'video'), path)
+    except SuspiciousFileOperation:
+        raise Http404("Vidéo non trouvée")
+    if not os.path.isfile(video_path):
+        # En développement, les fichiers ne sont pas collectés
+        video_path = finders.find(f'video/{path}')
+        if not video_path:
+            raise Http404("Vidéo non trouvée")
+
+    return ranged_file_response(request, video_path, max_age=settings.VIDEO_CACHE_MAX_AGE)
 
 
 def accueil(request):
@@ -160,25 +70,124 @@ def accueil(request):
     return serve_static_html(request, 'index.html')
 
 
-def liste_projets(request):
-    """Affiche la liste de tous les projets actifs"""
+# Valeur unique pour tous les filtres de catégorie inconnus (liste vide)
+CATEGORIE_INCONNUE = 'inconnue'
+
+
+def normalize_categorie(categorie):
+    """
+    Ramène le filtre ?categorie= à une valeur connue : une catégorie de
+    Projet.CATEGORIE_CHOICES, None (pas de filtre) ou CATEGORIE_INCONNUE.
+    Le nombre de pages en cache reste ainsi borné.
+    """
+    if not categorie:
+        return None
+    if categorie in dict(Projet.CATEGORIE_CHOICES):
+        return categorie
+    return CATEGORIE_INCONNUE
+
+
+# Nombre de projets par page du portfolio (3 par ligne)
+PROJETS_PAR_PAGE = 9
+
+
+def get_page_number(request):
+    """Numéro de page demandé (?page=N), 1 par défaut"""
+    try:
+        return max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        return 1
+
+
+def get_projets_page(categorie, number):
+    """
+    Page `number` des projets actifs de la catégorie. Lève Http404 pour une
+    page hors limites : seules les pages existantes sont mises en cache.
+    """
     projets = Projet.objects.filter(actif=True)
-    
-    # Filtrer par catégorie si demandé
-    categorie = request.GET.get('categorie')
     if categorie:
         projets = projets.filter(categorie=categorie)
-    
-    context = {
-        'projets': projets,
-        'categorie_active': categorie,
-    }
-    return render(request, 'projets/liste_projets.html', context)
+    paginator = Paginator(projets.order_by('-date_creation', '-pk'), PROJETS_PAR_PAGE)
+    try:
+        return paginator.page(number)
+    except InvalidPage:
+        raise Http404('Page de projets introuvable')
+
+
+def _page_url(name, categorie, number):
+    params = {'categorie': categorie} if categorie else {}
+    params['page'] = number
+    return f'{reverse(name)}?{urlencode(params)}'
+
+
+@precompressed_page
+def liste_projets(request):
+    """
+    Affiche une page de projets actifs (la première par défaut) ; les
+    suivantes sont chargées au défilement via liste_projets_fragment.
+    Chaque page est en cache par catégorie, jusqu'à la prochaine
+    modification d'un Projet ou d'une ImageProjet.
+    """
+    categorie = normalize_categorie(request.GET.get('categorie'))
+    number = get_page_number(request)
+    return use_compression_cache(HttpResponse(get_liste_projets_html(request, categorie, number)))
+
+
+def get_liste_projets_html(request, categorie, number):
+    """Page `number` du portfolio rendue en HTML, depuis le cache si possible"""
+
+    def build():
+        page = get_projets_page(categorie, number)
+        context = {
+            'projets': page.object_list,
+            'page_obj': page,
+            'categorie_active': categorie,
+        }
+        if page.has_next():
+            context['page_suivante_url'] = _page_url('projets:liste_projets', categorie, page.next_page_number())
+            context['fragment_suivant_url'] = _page_url('projets:liste_projets_fragment', categorie, page.next_page_number())
+        return render_to_string('projets/liste_projets.html', context, request=request)
+
+    return caching.get_or_build(f'liste_projets:{categorie or "tous"}:{number}', build)
+
+
+def liste_projets_fragment(request):
+    """
+    Page suivante du portfolio pour le défilement infini : les cartes déjà
+    rendues en HTML, l'URL du fragment suivant et celle de la page complète
+    correspondante (null à la dernière page).
+    """
+    categorie = normalize_categorie(request.GET.get('categorie'))
+    number = get_page_number(request)
+
+    def build():
+        page = get_projets_page(categorie, number)
+        data = {
+            'html': render_to_string('projets/partials/cartes_projets.html', {'projets': page.object_list}),
+            'suivant': None,
+            'page_suivante': None,
+        }
+        if page.has_next():
+            data['suivant'] = _page_url('projets:liste_projets_fragment', categorie, page.next_page_number())
+            data['page_suivante'] = _page_url('projets:liste_projets', categorie, page.next_page_number())
+        return data
+
+    return JsonResponse(caching.get_or_build(f'liste_projets_fragment:{categorie or "tous"}:{number}', build))
+
+
+def get_projet(slug):
+    return get_object_or_404(Projet, slug=slug, actif=True)
+
+
+def get_images_projet(slug):
+    """Images de la galerie, sans attendre le projet (vue async)"""
+    return list(ImageProjet.objects.filter(projet__slug=slug, projet__actif=True))
 
 
+@precompressed_page
 def projet_detail(request, slug):
     """Affiche le détail d'un projet avec sa galerie"""
-    projet = get_object_or_404(Projet, slug=slug, actif=True)
+    projet = get_projet(slug)
     images = projet.images.all()
     
     context = {
@@ -10,12 +10,17 @@ fi
 # Collecter les fichiers statiques
 python manage.py collectstatic --noinput || true
 
+# Prérendre les pages HTML statiques (servies par WhiteNoise)
+python manage.py prerender_pages || true
+
 # Exécuter les migrations
 python manage.py migrate --noinput || true
 
+# Reconstruire l'index des articles similaires
+python manage.py rebuild_related_articles || true
+
 # Créer le superutilisateur depuis les variables d'environnement (si définies)
 python manage.py create_admin_from_env || true
 
-# Démarrer Gunicorn
-exec python -m gunicorn liftandlight.wsgi --bind 0.0.0.0:${PORT:-8000} --workers 2 --timeout 120
-
+# Démarrer Gunicorn (workers, mode wsgi/asgi, préchauffage : gunicorn.conf.py)
+exec python -m gunicorn -c gunicorn.conf.py